@@ -4,6 +4,10 @@ from datetime import datetime, date
 from typing import List, Optional
 from enum import Enum
 
+from app.api.v1.endpoints.auth import get_current_user
+from app.models.money import Currency, Money
+from app.services.fx import fx_rates, UnknownCurrencyError
+
 router = APIRouter()
 
 class BookingStatus(str, Enum):
@@ -16,6 +20,7 @@ class PaymentStatus(str, Enum):
     PENDING = "pending"
     PAID = "paid"
     FAILED = "failed"
+    REFUND_PENDING = "refund_pending"
     REFUNDED = "refunded"
 
 class PaymentMethod(str, Enum):
@@ -31,6 +36,7 @@ class BookingItem(BaseModel):
     name: str
     quantity: int = 1
     price: float
+    currency: Currency = "INR"  # Currency the item is priced in
     date: date
     time: Optional[str] = None
     details: Optional[dict] = None
@@ -41,6 +47,7 @@ class CreateBooking(BaseModel):
     payment_method: PaymentMethod
     contact_info: dict
     special_requests: Optional[str] = None
+    currency: Currency = "INR"  # Currency to charge the booking in
 
 class BookingResponse(BaseModel):
     id: str
@@ -49,15 +56,73 @@ class BookingResponse(BaseModel):
     items: List[BookingItem]
     status: BookingStatus
     payment_status: PaymentStatus
-    total_amount: float
-    currency: str = "INR"
+    total_amount: Money
+    currency: Currency = "INR"
     created_at: datetime
     updated_at: datetime
 
+class BatchBookingRequest(BaseModel):
+    booking_ids: List[str] = Field(..., min_length=1, max_length=100)
+
+class BatchCancelRequest(BatchBookingRequest):
+    atomic: bool = True  # Cancel nothing unless every booking can be cancelled; False cancels what it can
+
+class BookingOutcome(BaseModel):
+    booking_id: str
+    status_code: int
+    detail: Optional[str] = None
+    booking: Optional[BookingResponse] = None
+
+class BatchBookingResponse(BaseModel):
+    results: List[BookingOutcome]
+    refund_batch_id: Optional[str] = None
+
 # Mock database
 mock_bookings = {}
 mock_booking_counter = 1
 
+# Refund batches waiting to be sent to the payment provider
+mock_refund_queue = []
+
+def _unique(ids: List[str]) -> List[str]:
+    return list(dict.fromkeys(ids))
+
+def _lookup_error(booking_id: str, current_user, action: str) -> Optional[tuple]:
+    """
+    Return (status_code, detail) if the user cannot access the booking.
+    """
+    if booking_id not in mock_bookings:
+        return 404, "Booking not found"
+    if mock_bookings[booking_id]["user_id"] != current_user.email:
+        return 403, f"Not authorized to {action} this booking"
+    return None
+
+def _cancellation_error(booking_id: str, current_user) -> Optional[tuple]:
+    error = _lookup_error(booking_id, current_user, "cancel")
+    if error:
+        return error
+    booking = mock_bookings[booking_id]
+    if booking["status"] == BookingStatus.CANCELLED:
+        return 400, "Booking is already cancelled"
+    if booking["status"] == BookingStatus.COMPLETED:
+        return 400, "Cannot cancel a completed booking"
+    return None
+
+def _enqueue_refunds(bookings: List[dict]) -> Optional[str]:
+    """
+    Queue refunds for all paid bookings as a single batch and mark them as
+    refund pending. The payment provider callback would mark them REFUNDED.
+    """
+    paid = [b for b in bookings if b["payment_status"] == PaymentStatus.PAID]
+    if not paid:
+        return None
+    refunds = [{"booking_id": b["id"], "amount": b["total_amount"], "currency": b["currency"]} for b in paid]
+    for booking in paid:
+        booking["payment_status"] = PaymentStatus.REFUND_PENDING
+    batch_id = f"refund_batch_{len(mock_refund_queue) + 1}"
+    mock_refund_queue.append({"id": batch_id, "refunds": refunds, "created_at": datetime.utcnow()})
+    return batch_id
+
 @router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
 async def create_booking(booking: CreateBooking, current_user: dict = Depends(get_current_user)):
     """
@@ -68,12 +133,20 @@ async def create_booking(booking: CreateBooking, current_user: dict = Depends(ge
     # In a real app, you would validate the booking details
     # and process the payment
     
+    # Calculate total amount, converting every item into the booking currency in one batch
+    try:
+        line_amounts = fx_rates.convert(
+            [item.price * item.quantity for item in booking.items],
+            [item.currency for item in booking.items],
+            booking.currency,
+        )
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    total_amount = fx_rates.total(line_amounts, booking.currency)
+    
     booking_id = f"book_{mock_booking_counter}"
     mock_booking_counter += 1
     
-    # Calculate total amount
-    total_amount = sum(item.price * item.quantity for item in booking.items)
-    
     # Create booking record
     booking_record = {
         "id": booking_id,
@@ -84,7 +157,7 @@ async def create_booking(booking: CreateBooking, current_user: dict = Depends(ge
         "payment_status": PaymentStatus.PAID,  # In a real app, this would depend on payment processing
         "payment_method": booking.payment_method,
         "total_amount": total_amount,
-        "currency": "INR",
+        "currency": booking.currency,
         "contact_info": booking.contact_info,
         "special_requests": booking.special_requests,
         "created_at": datetime.utcnow(),
@@ -102,6 +175,58 @@ async def create_booking(booking: CreateBooking, current_user: dict = Depends(ge
     
     return booking_record
 
+@router.post("/batch/get", response_model=BatchBookingResponse)
+async def get_bookings_batch(request: BatchBookingRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Get details of many bookings at once, with a per-booking outcome.
+    """
+    results = []
+    for booking_id in _unique(request.booking_ids):
+        error = _lookup_error(booking_id, current_user, "view")
+        if error:
+            results.append(BookingOutcome(booking_id=booking_id, status_code=error[0], detail=error[1]))
+        else:
+            results.append(BookingOutcome(booking_id=booking_id, status_code=200, booking=mock_bookings[booking_id]))
+    return BatchBookingResponse(results=results)
+
+@router.post("/batch/cancel", response_model=BatchBookingResponse)
+async def cancel_bookings_batch(request: BatchCancelRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Cancel many bookings in one transaction, with a per-booking outcome.
+    By default nothing is cancelled unless every booking can be; pass
+    atomic=false to cancel the bookings that can be and report the rest.
+    Refunds for all cancelled bookings are queued as a single batch.
+    """
+    # There is no await between checking and updating, so the whole batch
+    # is applied without interleaving with other requests
+    booking_ids = _unique(request.booking_ids)
+    errors = {booking_id: _cancellation_error(booking_id, current_user) for booking_id in booking_ids}
+    abort = request.atomic and any(errors.values())
+
+    results = []
+    cancelled = []
+    now = datetime.utcnow()
+    for booking_id in booking_ids:
+        error = errors[booking_id]
+        if error:
+            results.append(BookingOutcome(booking_id=booking_id, status_code=error[0], detail=error[1]))
+        elif abort:
+            results.append(BookingOutcome(
+                booking_id=booking_id,
+                status_code=409,
+                detail="Not cancelled because another booking in the batch failed",
+                booking=mock_bookings[booking_id],
+            ))
+        else:
+            booking = mock_bookings[booking_id]
+            booking["status"] = BookingStatus.CANCELLED
+            booking["updated_at"] = now
+            cancelled.append(booking)
+            results.append(BookingOutcome(booking_id=booking_id, status_code=200, booking=booking))
+
+    refund_batch_id = _enqueue_refunds(cancelled)
+    return BatchBookingResponse(results=results, refund_batch_id=refund_batch_id)
+
 @router.get("/{booking_id}", response_model=BookingResponse)
 async def get_booking(booking_id: str, current_user: dict = Depends(get_current_user)):
     """
@@ -139,29 +264,22 @@ async def cancel_booking(booking_id: str, current_user: dict = Depends(get_curre
     """
     Cancel a booking.
     """
-    if booking_id not in mock_bookings:
-        raise HTTPException(status_code=404, detail="Booking not found")
+    # Verify user has permission to cancel this booking and that it can be cancelled
+    error = _cancellation_error(booking_id, current_user)
+    if error:
+        raise HTTPException(status_code=error[0], detail=error[1])
     
     booking = mock_bookings[booking_id]
     
-    # Verify user has permission to cancel this booking
-    if booking["user_id"] != current_user.email:
-        raise HTTPException(status_code=403, detail="Not authorized to cancel this booking")
-    
-    # Check if booking can be cancelled
-    if booking["status"] == BookingStatus.CANCELLED:
-        raise HTTPException(status_code=400, detail="Booking is already cancelled")
-    
-    if booking["status"] == BookingStatus.COMPLETED:
-        raise HTTPException(status_code=400, detail="Cannot cancel a completed booking")
-    
     # Update booking status
     booking["status"] = BookingStatus.CANCELLED
     booking["updated_at"] = datetime.utcnow()
     
+    # Queue refund if applicable
+    _enqueue_refunds([booking])
+    
     # In a real app, you would also:
-    # 1. Process refund if applicable
-    # 2. Update inventory
-    # 3. Send cancellation email
+    # 1. Update inventory
+    # 2. Send cancellation email
     
     return booking
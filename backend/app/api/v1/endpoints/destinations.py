@@ -1,69 +1,115 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from datetime import date
+import io
+import math
+import re
+
+import numpy as np
+
+from app.api.v1.endpoints.auth import UserInDB, get_current_admin_user
+from app.models.catalog import Destination
+from app.models.money import Currency
+from app.models.trip import TripTheme, BudgetLevel, ActivityPreference
+from app.services.catalog import catalog
+from app.services.fx import fx_rates, minor_units, BASE_CURRENCY, UnknownCurrencyError
+from app.services.ingest import IngestReport, DEFAULT_BATCH_SIZE, detect_format, find_decode_error, ingest_stream
+from app.services.recommendations import get_index
 
 router = APIRouter()
 
-class Destination(BaseModel):
-    id: str
-    name: str
-    country: str
-    description: str
-    image_url: Optional[str] = None
-    popularity: int
-    best_time_to_visit: str
-    average_cost_per_day: float
-    
 class DestinationSearch(BaseModel):
     query: str
     limit: int = 10
+    currency: Optional[Currency] = None
     
 class PopularDestinationQuery(BaseModel):
     limit: int = 10
     country: Optional[str] = None
+    currency: Optional[Currency] = None
+
+class RecommendationRequest(BaseModel):
+    themes: List[TripTheme] = []
+    interests: List[ActivityPreference] = []
+    budget: Optional[float] = Field(None, gt=0, description="Total trip budget")
+    currency: Currency = "INR"  # Currency of the budget and of returned prices
+    budget_level: BudgetLevel = BudgetLevel.MID_RANGE
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    travelers: int = Field(1, ge=1)
+    country: Optional[str] = None
+    limit: int = Field(10, ge=1, le=100)
+
+class RecommendedDestination(Destination):
+    score: float
+
+def _priced_in(destinations: List[dict], currency: Optional[str]) -> List[dict]:
+    """
+    Copies of destinations with average_cost_per_day converted to currency, in one batch.
+    Destinations priced in a currency the rate table does not know are returned
+    in their own currency; only an unknown target currency is the caller's error.
+    """
+    if not currency or not destinations:
+        return destinations
+    try:
+        rates = fx_rates.rates([d.get("currency") or BASE_CURRENCY for d in destinations], currency)
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    costs = fx_rates.round(np.array([d["average_cost_per_day"] for d in destinations]) * rates, currency)
+    return [
+        dest if math.isnan(cost) else {**dest, "average_cost_per_day": float(cost), "currency": currency}
+        for dest, cost in zip(destinations, costs)
+    ]
+
+PRICE_RANGE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(?:-\s*(\d+(?:\.\d+)?)\s*)?$")
+
+def _activities_priced_in(activities: List[dict], currency: Optional[str]) -> List[dict]:
+    """
+    Copies of activities with the bounds of price_range ("500-1500" or "500")
+    converted to currency, in one batch. Ranges in another format, or in a
+    currency the rate table does not know, are returned as they are.
+    """
+    if not currency or not activities:
+        return activities
+    try:
+        rates = fx_rates.rates([a.get("currency") or BASE_CURRENCY for a in activities], currency)
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    bounds = np.full((len(activities), 2), np.nan)
+    for row, activity in enumerate(activities):
+        match = PRICE_RANGE_PATTERN.match(activity["price_range"])
+        if match:
+            bounds[row] = [float(match.group(1)), float(match.group(2) or match.group(1))]
+    bounds = fx_rates.round(bounds * rates[:, None], currency)
 
-# Mock data
-mock_destinations = [
-    {
-        "id": "1",
-        "name": "Goa",
-        "country": "India",
-        "description": "Famous for its beaches, nightlife, and Portuguese heritage.",
-        "image_url": "https://example.com/goa.jpg",
-        "popularity": 95,
-        "best_time_to_visit": "November to February",
-        "average_cost_per_day": 3500.0
-    },
-    {
-        "id": "2",
-        "name": "Jaipur",
-        "country": "India",
-        "description": "The Pink City known for its rich history and majestic forts.",
-        "image_url": "https://example.com/jaipur.jpg",
-        "popularity": 90,
-        "best_time_to_visit": "October to March",
-        "average_cost_per_day": 4000.0
-    },
-    {
-        "id": "3",
-        "name": "Kerala",
-        "country": "India",
-        "description": "God's Own Country with backwaters, beaches, and hill stations.",
-        "image_url": "https://example.com/kerala.jpg",
-        "popularity": 92,
-        "best_time_to_visit": "September to March",
-        "average_cost_per_day": 3800.0
-    }
-]
+    digits = minor_units(currency)
+    results = []
+    for activity, (low, high) in zip(activities, bounds):
+        if math.isnan(low):
+            results.append(activity)
+        else:
+            price_range = f"{low:.{digits}f}" if low == high else f"{low:.{digits}f}-{high:.{digits}f}"
+            results.append({**activity, "price_range": price_range, "currency": currency})
+    return results
+
+@router.get("/popular", response_model=List[Destination])
+async def get_popular_destinations(limit: int = 10, country: Optional[str] = None, currency: Optional[Currency] = None):
+    """
+    Get a list of popular destinations, optionally filtered by country.
+    """
+    # Popularity order and country filter come from the catalog's indexes
+    return _priced_in(catalog.popular(limit, country), currency)
 
 @router.get("/{destination_id}", response_model=Destination)
-async def get_destination(destination_id: str):
+async def get_destination(destination_id: str, currency: Optional[Currency] = None):
     """
     Get details of a specific destination by ID.
     """
-    for dest in mock_destinations:
-        if dest["id"] == destination_id:
-            return dest
+    dest = catalog.get_destination(destination_id)
+    if dest is not None:
+        return _priced_in([dest], currency)[0]
     raise HTTPException(status_code=404, detail="Destination not found")
 
 @router.post("/search", response_model=List[Destination])
@@ -71,53 +117,79 @@ async def search_destinations(search: DestinationSearch):
     """
     Search for destinations by name, description, or other attributes.
     """
-    query = search.query.lower()
-    results = [
-        dest for dest in mock_destinations 
-        if (query in dest["name"].lower() or 
-            query in dest["description"].lower() or
-            query in dest["country"].lower())
-    ]
-    return results[:search.limit]
+    # A search over a large catalog is CPU-bound, keep it off the event loop
+    results = await run_in_threadpool(catalog.search, search.query, search.limit)
+    return _priced_in(results, search.currency)
 
-@router.get("/popular", response_model=List[Destination])
-async def get_popular_destinations(limit: int = 10, country: Optional[str] = None):
+@router.post("/recommendations", response_model=List[RecommendedDestination])
+async def recommend_destinations(request: RecommendationRequest):
     """
-    Get a list of popular destinations, optionally filtered by country.
+    Recommend destinations matching trip themes, interests, budget and travel dates.
     """
-    results = mock_destinations
-    if country:
-        results = [d for d in results if d["country"].lower() == country.lower()]
+    if request.start_date and request.end_date and request.start_date > request.end_date:
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+    if request.budget and not (request.start_date and request.end_date):
+        # The budget is per trip; without dates there is no per-day figure to compare against
+        raise HTTPException(status_code=400, detail="A budget requires both start_date and end_date")
+    
+    # Building the index (first request after a snapshot is attached) is CPU-bound, keep it off the event loop
+    index = await run_in_threadpool(get_index)
+    
+    daily_budget = None
+    if request.budget:
+        days = (request.end_date - request.start_date).days + 1
+        daily_budget = request.budget / (days * request.travelers)
+        # The index compares costs in the base currency
+        try:
+            daily_budget = float(fx_rates.convert([daily_budget], request.currency, BASE_CURRENCY)[0])
+        except UnknownCurrencyError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
-    # Sort by popularity and limit results
-    results.sort(key=lambda x: x["popularity"], reverse=True)
-    return results[:limit]
+    preferences = index.preference_vector(
+        request.themes, request.interests, request.budget_level, request.start_date, request.end_date
+    )
+    results = []
+    for destination_id, score in index.top_k(preferences, request.limit, daily_budget, request.country):
+        dest = catalog.get_destination(destination_id)
+        if dest is not None:
+            results.append({**dest, "score": round(score, 4)})
+    return _priced_in(results, request.currency)
 
 @router.get("/{destination_id}/activities")
-async def get_destination_activities(destination_id: str):
-    """
-    Get popular activities for a specific destination.
-    """
-    # In a real app, this would come from a database
-    activities = {
-        "1": [
-            {"id": "a1", "name": "Beach Hopping", "duration": 6, "price_range": "500-1500"},
-            {"id": "a2", "name": "Water Sports at Baga Beach", "duration": 3, "price_range": "1000-3000"},
-            {"id": "a3", "name": "Fort Aguada Visit", "duration": 2, "price_range": "200-500"}
-        ],
-        "2": [
-            {"id": "a4", "name": "Amber Fort Tour", "duration": 3, "price_range": "800-2000"},
-            {"id": "a5", "name": "City Palace Visit", "duration": 2, "price_range": "500-1500"},
-            {"id": "a6", "name": "Elephant Ride", "duration": 1, "price_range": "1000-2000"}
-        ],
-        "3": [
-            {"id": "a7", "name": "Backwater Cruise", "duration": 8, "price_range": "2000-5000"},
-            {"id": "a8", "name": "Ayurvedic Massage", "duration": 2, "price_range": "1500-4000"},
-            {"id": "a9", "name": "Tea Plantation Tour", "duration": 4, "price_range": "1000-2500"}
-        ]
-    }
-    
-    if destination_id not in activities:
+async def get_destination_activities(destination_id: str, currency: Optional[Currency] = None):
+    """
+    Get popular activities for a specific destination, optionally priced in another currency.
+    """
+    activities = catalog.get_activities(destination_id)
+    if not activities:
         raise HTTPException(status_code=404, detail="No activities found for this destination")
     
-    return activities[destination_id]
+    return _activities_priced_in(activities, currency)
+
+@router.post("/admin/ingest", response_model=IngestReport)
+async def ingest_catalog_feed(
+    file: UploadFile = File(...),
+    kind: str = Query("destinations", pattern="^(destinations|activities)$"),
+    format: Optional[str] = Query(None, pattern="^(jsonl|csv)$"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=50000),
+    current_user: UserInDB = Depends(get_current_admin_user),
+):
+    """
+    Stream-parse a partner feed (JSONL or CSV) and upsert it into the catalog.
+    Returns a throughput report. Admin users only.
+    """
+    fmt = format or detect_format(file.filename or "")
+    # Refuse undecodable feeds up front, before any batch has been upserted
+    decode_error = await run_in_threadpool(find_decode_error, file.file)
+    if decode_error:
+        raise HTTPException(status_code=400, detail=decode_error)
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        # Parsing and validation are CPU-bound, keep them off the event loop
+        report = await run_in_threadpool(ingest_stream, stream, fmt, kind, batch_size, catalog)
+    finally:
+        stream.detach()
+    if report.feed_error:
+        raise HTTPException(status_code=400, detail=report.model_dump())
+    return report
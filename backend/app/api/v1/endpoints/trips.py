@@ -1,34 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Optional
 from pydantic import BaseModel, Field
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from enum import Enum
 
-router = APIRouter()
+from app.models.money import Currency
+from app.models.trip import TripTheme, BudgetLevel, ActivityPreference
+from app.services.fx import fx_rates, UnknownCurrencyError
 
-class TripTheme(str, Enum):
-    ADVENTURE = "adventure"
-    BEACH = "beach"
-    CULTURAL = "cultural"
-    LUXURY = "luxury"
-    BACKPACKING = "backpacking"
-    FAMILY = "family"
-    HONEYMOON = "honeymoon"
-    ROAD_TRIP = "road_trip"
-    FOOD = "food"
-    NIGHTLIFE = "nightlife"
-    SHOPPING = "shopping"
-    WILDLIFE = "wildlife"
-    WELLNESS = "wellness"
-    PHOTOGRAPHY = "photography"
-    RELIGIOUS = "religious"
-    EDUCATIONAL = "educational"
-    BUSINESS = "business"
+# The placeholder itinerary below is priced in USD
+SAMPLE_COST_CURRENCY = "USD"
 
-class BudgetLevel(str, Enum):
-    BUDGET = "budget"
-    MID_RANGE = "mid_range"
-    LUXURY = "luxury"
+router = APIRouter()
 
 class TravelerType(str, Enum):
     SOLO = "solo"
@@ -37,15 +20,12 @@ class TravelerType(str, Enum):
     FRIENDS = "friends"
     BUSINESS = "business"
 
-class ActivityPreference(BaseModel):
-    name: str
-    interest_level: int = Field(..., ge=1, le=5, description="Interest level from 1 (low) to 5 (high)")
-
 class TripRequest(BaseModel):
     destination: str
     start_date: date
     end_date: date
     budget: float
+    currency: Currency = "INR"  # Currency of the budget and of all costs in the plan
     budget_level: BudgetLevel = BudgetLevel.MID_RANGE
     travelers: int = 1
     traveler_type: TravelerType = TravelerType.SOLO
@@ -68,6 +48,7 @@ class TripPlanResponse(BaseModel):
     start_date: date
     end_date: date
     total_estimated_cost: float
+    currency: Currency = "INR"
     daily_plans: List[TripDayPlan]
     summary: str
     created_at: datetime
@@ -97,7 +78,8 @@ async def plan_trip(trip_request: TripRequest):
         "destination": trip_request.destination,
         "start_date": trip_request.start_date,
         "end_date": trip_request.end_date,
-        "total_estimated_cost": trip_request.budget * 0.9,  # 90% of budget used
+        "total_estimated_cost": 0.0,  # Sum of the daily costs, filled in below
+        "currency": trip_request.currency,
         "daily_plans": [],
         "summary": f"A {duration}-day trip to {trip_request.destination} with a {trip_request.budget_level} budget, focusing on {', '.join([theme.value for theme in trip_request.themes])}.",
         "created_at": datetime.utcnow(),
@@ -146,9 +128,27 @@ async def plan_trip(trip_request: TripRequest):
                     "location": "Riverside District"
                 }
             ],
-            "estimated_cost": 125.0
+            "estimated_cost": 0.0
         })
     
+    # Convert the whole itinerary into the trip currency in one batch
+    activities = [activity for day in trip_plan["daily_plans"] for activity in day["activities"]]
+    try:
+        costs = fx_rates.convert([a["cost"] for a in activities], SAMPLE_COST_CURRENCY, trip_request.currency)
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    costs = fx_rates.round(costs, trip_request.currency)
+    for activity, cost in zip(activities, costs):
+        activity["cost"] = float(cost)
+    
+    # Exact per-day and trip totals
+    position = 0
+    for day in trip_plan["daily_plans"]:
+        count = len(day["activities"])
+        day["estimated_cost"] = float(fx_rates.total(costs[position:position + count], trip_request.currency))
+        position += count
+    trip_plan["total_estimated_cost"] = float(fx_rates.total(costs, trip_request.currency))
+    
     return trip_plan
 
 @router.get("/{trip_id}", response_model=TripPlanResponse)
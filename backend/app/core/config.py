@@ -15,6 +15,8 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # Comma-separated emails of users allowed to call admin endpoints
+    ADMIN_EMAILS: str = os.getenv("ADMIN_EMAILS", "")
     
     # Google Cloud Settings
     GOOGLE_CLOUD_PROJECT: Optional[str] = os.getenv("GOOGLE_CLOUD_PROJECT")
@@ -30,6 +32,17 @@ class Settings(BaseSettings):
     VERTEX_AI_LOCATION: str = os.getenv("VERTEX_AI_LOCATION", "us-central1")
     VERTEX_AI_PROJECT_ID: Optional[str] = os.getenv("VERTEX_AI_PROJECT_ID")
     
+    # Memory-mapped catalog snapshot (see app.services.snapshot), shared by all workers
+    CATALOG_SNAPSHOT_PATH: Optional[str] = os.getenv("CATALOG_SNAPSHOT_PATH")
+    
+    # Catalog feeds (JSONL or CSV) loaded into the catalog store on startup
+    CATALOG_DESTINATIONS_PATH: Optional[str] = os.getenv("CATALOG_DESTINATIONS_PATH")
+    CATALOG_ACTIVITIES_PATH: Optional[str] = os.getenv("CATALOG_ACTIVITIES_PATH")
+    
+    # Currency exchange rates: local JSON rates file and how often to check it for changes
+    FX_RATES_PATH: Optional[str] = os.getenv("FX_RATES_PATH")
+    FX_REFRESH_SECONDS: int = int(os.getenv("FX_REFRESH_SECONDS", "3600"))
+    
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = [
         "http://localhost:3000",
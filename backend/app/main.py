@@ -12,6 +12,20 @@ load_dotenv()
 # Import routers
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.services.catalog import catalog
+from app.services.ingest import load_catalog_files
+from app.services.recommendations import get_index
+from app.services.snapshot import CatalogSnapshot
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.CATALOG_SNAPSHOT_PATH:
+        catalog.attach_snapshot(CatalogSnapshot(settings.CATALOG_SNAPSHOT_PATH))
+    # Load partner catalog feeds, if configured; these are applied on top of the snapshot
+    load_catalog_files(settings.CATALOG_DESTINATIONS_PATH, settings.CATALOG_ACTIVITIES_PATH)
+    # Attach the recommendation index before serving traffic; upserts keep it current from here on
+    get_index()
+    yield
 
 # Create FastAPI application
 app = FastAPI(
@@ -20,7 +34,8 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan
 )
 
 # Set up CORS
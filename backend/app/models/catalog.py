@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from app.models.money import Currency
+
+class Destination(BaseModel):
+    id: str
+    name: str
+    country: str
+    description: str
+    image_url: Optional[str] = None
+    popularity: int = Field(..., ge=0, le=2**31 - 1)  # Stored as int32 in snapshots and the recommendation index
+    best_time_to_visit: str
+    average_cost_per_day: float
+    currency: Currency = "INR"  # Currency of average_cost_per_day
+
+class Activity(BaseModel):
+    id: str
+    destination_id: str
+    name: str
+    duration: int  # hours
+    price_range: str  # e.g. "500-1500"
+    currency: Currency = "INR"  # Currency of price_range
@@ -0,0 +1,9 @@
+from decimal import Decimal
+from pydantic import PlainSerializer, StringConstraints
+from typing_extensions import Annotated
+
+# ISO 4217 code, e.g. "INR"
+Currency = Annotated[str, StringConstraints(to_upper=True, pattern=r"^[A-Za-z]{3}$")]
+
+# Exact amount internally, plain JSON number on the wire
+Money = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from enum import Enum
+
+class TripTheme(str, Enum):
+    ADVENTURE = "adventure"
+    BEACH = "beach"
+    CULTURAL = "cultural"
+    LUXURY = "luxury"
+    BACKPACKING = "backpacking"
+    FAMILY = "family"
+    HONEYMOON = "honeymoon"
+    ROAD_TRIP = "road_trip"
+    FOOD = "food"
+    NIGHTLIFE = "nightlife"
+    SHOPPING = "shopping"
+    WILDLIFE = "wildlife"
+    WELLNESS = "wellness"
+    PHOTOGRAPHY = "photography"
+    RELIGIOUS = "religious"
+    EDUCATIONAL = "educational"
+    BUSINESS = "business"
+
+class BudgetLevel(str, Enum):
+    BUDGET = "budget"
+    MID_RANGE = "mid_range"
+    LUXURY = "luxury"
+
+class ActivityPreference(BaseModel):
+    name: str
+    interest_level: int = Field(..., ge=1, le=5, description="Interest level from 1 (low) to 5 (high)")
@@ -0,0 +1,250 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from heapq import merge
+from threading import RLock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.snapshot import CatalogSnapshot
+
+# Seed data for development, loaded only when no snapshot or destinations feed
+# is configured. Admin uploads are merged into it like into any other catalog.
+mock_destinations = [
+    {
+        "id": "1",
+        "name": "Goa",
+        "country": "India",
+        "description": "Famous for its beaches, nightlife, and Portuguese heritage.",
+        "image_url": "https://example.com/goa.jpg",
+        "popularity": 95,
+        "best_time_to_visit": "November to February",
+        "average_cost_per_day": 3500.0,
+        "currency": "INR"
+    },
+    {
+        "id": "2",
+        "name": "Jaipur",
+        "country": "India",
+        "description": "The Pink City known for its rich history and majestic forts.",
+        "image_url": "https://example.com/jaipur.jpg",
+        "popularity": 90,
+        "best_time_to_visit": "October to March",
+        "average_cost_per_day": 4000.0,
+        "currency": "INR"
+    },
+    {
+        "id": "3",
+        "name": "Kerala",
+        "country": "India",
+        "description": "God's Own Country with backwaters, beaches, and hill stations.",
+        "image_url": "https://example.com/kerala.jpg",
+        "popularity": 92,
+        "best_time_to_visit": "September to March",
+        "average_cost_per_day": 3800.0,
+        "currency": "INR"
+    }
+]
+
+mock_activities = [
+    {"id": "a1", "destination_id": "1", "name": "Beach Hopping", "duration": 6, "price_range": "500-1500", "currency": "INR"},
+    {"id": "a2", "destination_id": "1", "name": "Water Sports at Baga Beach", "duration": 3, "price_range": "1000-3000", "currency": "INR"},
+    {"id": "a3", "destination_id": "1", "name": "Fort Aguada Visit", "duration": 2, "price_range": "200-500", "currency": "INR"},
+    {"id": "a4", "destination_id": "2", "name": "Amber Fort Tour", "duration": 3, "price_range": "800-2000", "currency": "INR"},
+    {"id": "a5", "destination_id": "2", "name": "City Palace Visit", "duration": 2, "price_range": "500-1500", "currency": "INR"},
+    {"id": "a6", "destination_id": "2", "name": "Elephant Ride", "duration": 1, "price_range": "1000-2000", "currency": "INR"},
+    {"id": "a7", "destination_id": "3", "name": "Backwater Cruise", "duration": 8, "price_range": "2000-5000", "currency": "INR"},
+    {"id": "a8", "destination_id": "3", "name": "Ayurvedic Massage", "duration": 2, "price_range": "1500-4000", "currency": "INR"},
+    {"id": "a9", "destination_id": "3", "name": "Tea Plantation Tour", "duration": 4, "price_range": "1000-2500", "currency": "INR"}
+]
+
+class CatalogStore:
+    """
+    In-memory destination/activity catalog.
+
+    Indexes (country and popularity order) are maintained incrementally on
+    every upsert, so loading a large feed never triggers a full rebuild.
+
+    A memory-mapped snapshot can be attached as a read-only base layer;
+    upserted records are kept in memory and shadow snapshot rows by id.
+
+    Derived indexes subscribe to upserts and are told which destinations
+    changed, so they can update those rows in place.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._listeners: List[Callable[["CatalogStore", Set[str]], None]] = []
+        self._reset()
+
+    def _reset(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self.destinations: Dict[str, dict] = {}
+        self.activities: Dict[str, Dict[str, dict]] = defaultdict(dict)
+        self._activity_owner: Dict[str, str] = {}
+        # Sorted (-popularity, id) pairs, most popular first: across all
+        # destinations, and per lower-cased country
+        self._popularity: List[Tuple[int, str]] = []
+        self._by_country: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    def attach_snapshot(self, snapshot: CatalogSnapshot):
+        """
+        Serve the catalog from a snapshot, replacing all in-memory records.
+        Subscribers are not notified; they should compare `snapshot` and rebuild.
+        """
+        with self._lock:
+            self._reset()
+            self._snapshot = snapshot
+
+    def subscribe(self, listener: Callable[["CatalogStore", Set[str]], None]):
+        """
+        Call listener(store, destination_ids) after every upsert, with the ids
+        of the destinations whose record or activities changed. The listener
+        is first called once with every destination upserted so far.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            existing = set(self.destinations) | {i for i, by_id in self.activities.items() if by_id}
+            if existing:
+                listener(self, existing)
+
+    def unsubscribe(self, listener: Callable[["CatalogStore", Set[str]], None]):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify(self, destination_ids: Set[str]):
+        # Still under the lock, so listeners see upserts in order
+        if destination_ids:
+            for listener in list(self._listeners):
+                listener(self, destination_ids)
+
+    def upsert_destinations(self, records: Iterable[dict]) -> int:
+        count = 0
+        changed = set()
+        with self._lock:
+            for record in records:
+                self._unindex_destination(record["id"])
+                self.destinations[record["id"]] = record
+                key = (-record["popularity"], record["id"])
+                insort(self._popularity, key)
+                insort(self._by_country[record["country"].lower()], key)
+                changed.add(record["id"])
+                count += 1
+            self._notify(changed)
+        return count
+
+    def upsert_activities(self, records: Iterable[dict]) -> int:
+        count = 0
+        changed = set()
+        with self._lock:
+            for record in records:
+                previous_owner = self._activity_owner.get(record["id"])
+                if previous_owner is not None and previous_owner != record["destination_id"]:
+                    self.activities[previous_owner].pop(record["id"], None)
+                    changed.add(previous_owner)
+                self.activities[record["destination_id"]][record["id"]] = record
+                self._activity_owner[record["id"]] = record["destination_id"]
+                changed.add(record["destination_id"])
+                count += 1
+            self._notify(changed)
+        return count
+
+    def _unindex_destination(self, destination_id: str):
+        existing = self.destinations.get(destination_id)
+        if existing is None:
+            return
+        key = (-existing["popularity"], destination_id)
+        _remove_sorted(self._popularity, key)
+        _remove_sorted(self._by_country[existing["country"].lower()], key)
+
+    def get_destination(self, destination_id: str) -> Optional[dict]:
+        dest = self.destinations.get(destination_id)
+        if dest is None and self._snapshot is not None:
+            dest = self._snapshot.find_destination(destination_id)
+        return dest
+
+    def get_activities(self, destination_id: str) -> List[dict]:
+        results = []
+        if self._snapshot is not None:
+            results = [
+                a for a in self._snapshot.activities_for(destination_id)
+                if a["id"] not in self._activity_owner
+            ]
+        return results + list(self.activities.get(destination_id, {}).values())
+
+    def iter_destinations(self) -> Iterator[dict]:
+        yield from list(self.destinations.values())
+        if self._snapshot is not None:
+            for dest in self._snapshot.iter_destinations():
+                if dest["id"] not in self.destinations:
+                    yield dest
+
+    def iter_activities(self) -> Iterator[dict]:
+        for by_id in list(self.activities.values()):
+            yield from list(by_id.values())
+        if self._snapshot is not None:
+            for activity in self._snapshot.iter_activities():
+                if activity["id"] not in self._activity_owner:
+                    yield activity
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        query = query.lower()
+        results = []
+        for dest in list(self.destinations.values()):
+            if (query in dest["name"].lower() or
+                    query in dest["description"].lower() or
+                    query in dest["country"].lower()):
+                results.append(dest)
+                if len(results) >= limit:
+                    return results
+        if self._snapshot is not None:
+            # Matched on the string columns; only matching rows are decoded
+            ids = self._snapshot.column("dest.id")
+            for row in self._snapshot.search_rows(query):
+                if self._snapshot.string(ids[row]) not in self.destinations:
+                    results.append(self._snapshot.destination(int(row)))
+                    if len(results) >= limit:
+                        break
+        return results
+
+    def popular(self, limit: int, country: Optional[str] = None) -> List[dict]:
+        keys = self._by_country.get(country.lower(), []) if country else self._popularity
+        overlay = ((key, None) for key in keys)
+        if self._snapshot is None:
+            ranked = overlay
+        else:
+            # Merge both popularity orders, skipping snapshot rows that were upserted since
+            # (the snapshot's country ordering is its equivalent of _by_country)
+            base = (
+                (key, row) for key, row in self._snapshot.iter_by_popularity(country)
+                if key[1] not in self.destinations
+            )
+            ranked = merge(overlay, base, key=lambda item: item[0])
+
+        results = []
+        for (_, destination_id), row in ranked:
+            results.append(self.destinations[destination_id] if row is None else self._snapshot.destination(row))
+            if len(results) >= limit:
+                break
+        return results
+
+    def __len__(self):
+        if self._snapshot is None:
+            return len(self.destinations)
+        shadowed = sum(1 for i in self.destinations if self._snapshot.find_destination_row(i) is not None)
+        return len(self.destinations) + self._snapshot.destination_count - shadowed
+
+def _remove_sorted(keys: List[Tuple[int, str]], key: Tuple[int, str]):
+    position = bisect_left(keys, key)
+    if position < len(keys) and keys[position] == key:
+        del keys[position]
+
+# Shared catalog instance
+catalog = CatalogStore()
+if not (settings.CATALOG_SNAPSHOT_PATH or settings.CATALOG_DESTINATIONS_PATH):
+    catalog.upsert_destinations(mock_destinations)
+    catalog.upsert_activities(mock_activities)
@@ -0,0 +1,133 @@
+"""
+Static destination features: theme affinities and months worth visiting.
+
+These depend only on a destination's text and its activity names, so they
+are computed once per destination (and stored in catalog snapshots) rather
+than on every recommendation request.
+"""
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from app.models.trip import TripTheme
+
+# Destinations carry no theme tags, so affinities are derived from keywords
+# in the name, description and activity names. Keywords match whole words
+# only, so every inflection that should count is listed explicitly.
+THEME_KEYWORDS: Dict[TripTheme, Tuple[str, ...]] = {
+    TripTheme.ADVENTURE: (
+        "adventure", "adventures", "adventurous", "trek", "treks", "trekking", "hike", "hikes", "hiking",
+        "rafting", "water sports", "paragliding", "climbing", "diving", "scuba",
+    ),
+    TripTheme.BEACH: ("beach", "beaches", "coast", "coastal", "coastline", "island", "islands", "seaside"),
+    TripTheme.CULTURAL: (
+        "heritage", "history", "historic", "historical", "fort", "forts", "fortress", "palace", "palaces",
+        "culture", "cultural", "museum", "museums",
+    ),
+    TripTheme.LUXURY: ("luxury", "luxurious", "resort", "resorts", "palace", "palaces", "spa", "spas"),
+    TripTheme.BACKPACKING: ("backpacking", "backpacker", "backpackers", "hostel", "hostels", "budget"),
+    TripTheme.FAMILY: ("family", "families", "kids", "children", "zoo", "zoos", "theme park", "theme parks"),
+    TripTheme.HONEYMOON: ("romantic", "romance", "honeymoon", "houseboat", "houseboats", "backwater", "backwaters"),
+    TripTheme.ROAD_TRIP: ("road trip", "road trips", "drive", "drives", "scenic route", "hill station", "hill stations"),
+    TripTheme.FOOD: ("food", "foodie", "cuisine", "cuisines", "street food", "restaurant", "restaurants", "spice", "spices"),
+    TripTheme.NIGHTLIFE: ("nightlife", "party", "parties", "club", "clubs", "clubbing", "bar", "bars", "pub", "pubs"),
+    TripTheme.SHOPPING: ("shopping", "market", "markets", "bazaar", "bazaars"),
+    TripTheme.WILDLIFE: (
+        "wildlife", "safari", "safaris", "national park", "national parks", "tiger", "tigers",
+        "elephant", "elephants", "bird", "birds", "birding", "birdwatching",
+    ),
+    TripTheme.WELLNESS: (
+        "ayurveda", "ayurvedic", "yoga", "wellness", "spa", "spas", "massage", "massages", "retreat", "retreats",
+    ),
+    TripTheme.PHOTOGRAPHY: (
+        "scenic", "photography", "photographer", "photographers", "landscape", "landscapes",
+        "sunset", "sunsets", "views", "plantation", "plantations",
+    ),
+    TripTheme.RELIGIOUS: (
+        "temple", "temples", "church", "churches", "mosque", "mosques", "pilgrim", "pilgrims", "pilgrimage",
+        "shrine", "shrines", "monastery", "monasteries",
+    ),
+    TripTheme.EDUCATIONAL: ("museum", "museums", "university", "universities", "history", "historic", "historical", "science"),
+    TripTheme.BUSINESS: ("business", "conference", "conferences", "convention", "conventions"),
+}
+THEMES = list(TripTheme)
+# Theme columns for every keyword (some keywords, like "museum", count for several themes)
+KEYWORD_THEMES: Dict[str, List[int]] = {}
+for _column, _theme in enumerate(THEMES):
+    for _keyword in (_theme.value.replace("_", " "),) + THEME_KEYWORDS[_theme]:
+        KEYWORD_THEMES.setdefault(_keyword, []).append(_column)
+KEYWORD_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(k) for k in sorted(KEYWORD_THEMES, key=len, reverse=True)) + r")\b"
+)
+
+def theme_columns(text: str) -> Set[int]:
+    """
+    Theme columns mentioned in lower-cased text.
+    """
+    return {column for match in KEYWORD_PATTERN.finditer(text) for column in KEYWORD_THEMES[match.group(1)]}
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+MONTH_NAMES: Dict[str, int] = {}
+for _month, _name in enumerate([
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+]):
+    MONTH_NAMES[_name] = _month
+    MONTH_NAMES[_name[:3]] = _month
+MONTH_NAMES["sept"] = 8
+_MONTH = "|".join(sorted(MONTH_NAMES, key=len, reverse=True))
+MONTH_PATTERN = re.compile(r"\b(" + _MONTH + r")\b\.?")
+# "November to February", "Oct-Mar", "June through August"
+MONTH_RANGE_PATTERN = re.compile(
+    r"\b(" + _MONTH + r")\b\.?\s*(?:to|till|until|through|thru|-|–|—)\s*\b(" + _MONTH + r")\b\.?"
+)
+YEAR_ROUND_PATTERN = re.compile(r"\b(?:year[- ]round|all year|all[- ]season|throughout the year|any ?time)\b")
+
+N_STATIC_FEATURES = len(THEMES) + len(MONTHS)
+SEASON_OFFSET = len(THEMES)
+
+# Changes whenever the vocabulary does, so snapshots written with an older
+# one are not trusted for precomputed features
+FEATURE_SCHEMA = zlib.crc32(repr((
+    [t.value for t in THEMES], sorted(KEYWORD_THEMES.items()), sorted(MONTH_NAMES.items()),
+    MONTH_RANGE_PATTERN.pattern, YEAR_ROUND_PATTERN.pattern,
+)).encode("utf-8"))
+
+@lru_cache(maxsize=1024)
+def season_vector(best_time_to_visit: str) -> np.ndarray:
+    """
+    Months in "November to February" style text; every range and single
+    month mentioned counts. Unknown text counts every month as half a match.
+    """
+    text = best_time_to_visit.lower()
+    months = np.zeros(len(MONTHS), dtype=np.float32)
+    if YEAR_ROUND_PATTERN.search(text):
+        months[:] = 1.0
+    else:
+        in_range = []
+        for match in MONTH_RANGE_PATTERN.finditer(text):
+            start, end = MONTH_NAMES[match.group(1)], MONTH_NAMES[match.group(2)]
+            span = (end - start) % len(MONTHS) + 1
+            months[[(start + i) % len(MONTHS) for i in range(span)]] = 1.0
+            in_range.append(match.span())
+        for match in MONTH_PATTERN.finditer(text):
+            if not any(lo <= match.start() < hi for lo, hi in in_range):
+                months[MONTH_NAMES[match.group(1)]] = 1.0
+        if not months.any():
+            months[:] = 0.5
+    # Cached, so hand out a read-only array
+    months.flags.writeable = False
+    return months
+
+def static_features(destination: dict, activity_names: Iterable[str]) -> np.ndarray:
+    """
+    Theme and season features of one destination.
+    """
+    features = np.zeros(N_STATIC_FEATURES, dtype=np.float32)
+    text = " ".join([destination["name"], destination["description"], *activity_names]).lower()
+    features[list(theme_columns(text))] = 1.0
+    features[SEASON_OFFSET:] = season_vector(destination["best_time_to_visit"])
+    return features
@@ -0,0 +1,166 @@
+"""
+Foreign exchange rates and batch currency conversion.
+
+Rates are loaded from a local JSON file (FX_RATES_PATH) and kept in memory;
+the file is re-read when it changes, at most every FX_REFRESH_SECONDS.
+Conversions work on whole arrays of amounts at once, and totals are summed
+in integer minor units so they are exact.
+
+Rates file format:
+    {"base": "INR", "rates": {"INR": 1.0, "USD": 83.2, ...}}
+where each rate is the value of one unit of that currency in the base currency.
+"""
+import json
+import math
+import os
+import time
+from decimal import Decimal
+from threading import Lock
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from app.core.config import settings
+
+BASE_CURRENCY = "INR"
+
+# Fallback rates (INR per unit), used until a rates file is configured
+DEFAULT_RATES = {
+    "INR": 1.0,
+    "USD": 83.2,
+    "EUR": 90.5,
+    "GBP": 104.0,
+    "AED": 22.65,
+    "SGD": 61.3,
+    "AUD": 54.5,
+    "THB": 2.3,
+    "JPY": 0.56,
+}
+
+# Digits after the decimal point; currencies not listed use 2
+MINOR_UNITS = {"JPY": 0}
+
+class UnknownCurrencyError(ValueError):
+    pass
+
+def minor_units(currency: str) -> int:
+    return MINOR_UNITS.get(currency, 2)
+
+class FxRateTable:
+    """
+    In-memory rate table, refreshed from disk when the rates file changes.
+    """
+
+    def __init__(self, path: Optional[str] = None, refresh_seconds: float = 3600):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._lock = Lock()
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        # Bumped whenever the rates change, so cached conversions know to rebuild
+        self.version = 0
+        self._set_rates(DEFAULT_RATES)
+        self.refresh(force=True)
+
+    def _set_rates(self, rates: Dict[str, float]):
+        codes = sorted(rates)
+        # Swapped in as one tuple so readers never see a mismatched index and array
+        self._table = (
+            {code: position for position, code in enumerate(codes)},
+            np.array([rates[code] for code in codes], dtype=np.float64),
+        )
+        self.version += 1
+
+    def refresh(self, force: bool = False):
+        if not self.path:
+            return
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_seconds:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                self._load()
+            except (OSError, ValueError, KeyError):
+                # Keep serving the last good rates; only a failed initial load is fatal
+                if force:
+                    raise
+
+    def _load(self):
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        rates = {code.upper(): float(rate) for code, rate in data["rates"].items()}
+        for code, rate in rates.items():
+            # A zero, negative or NaN rate would poison every conversion; fail the load instead
+            if not math.isfinite(rate) or rate <= 0:
+                raise ValueError(f"Invalid rate for {code}: {rate}")
+        base = data.get("base", BASE_CURRENCY).upper()
+        if base != BASE_CURRENCY:
+            # Re-express the table in the base currency
+            if BASE_CURRENCY not in rates:
+                raise ValueError(f"Rates file must include {BASE_CURRENCY}")
+            rates = {code: rate / rates[BASE_CURRENCY] for code, rate in rates.items()}
+        rates[BASE_CURRENCY] = 1.0
+        self._set_rates(rates)
+        self._mtime = mtime
+
+    @property
+    def currencies(self) -> Iterable[str]:
+        return self._table[0].keys()
+
+    def _positions(self, index: Dict[str, int], currencies: Union[str, Sequence[str]], count: int) -> np.ndarray:
+        if isinstance(currencies, str):
+            currencies = [currencies]
+        # Look up each distinct currency once
+        codes, inverse = np.unique(np.asarray(currencies, dtype=str), return_inverse=True)
+        try:
+            positions = np.array([index[code] for code in codes], dtype=np.intp)
+        except KeyError as e:
+            raise UnknownCurrencyError(f"Unsupported currency: {e.args[0]}") from None
+        positions = positions[inverse]
+        return np.broadcast_to(positions, (count,)) if len(positions) == 1 else positions
+
+    def convert(self, amounts: Sequence[float], from_currencies: Union[str, Sequence[str]], to_currency: str) -> np.ndarray:
+        """
+        Convert many amounts at once. from_currencies is one code for all
+        amounts or one code per amount.
+        """
+        self.refresh()
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if amounts.size == 0:
+            return amounts
+        index, rates = self._table
+        source = rates[self._positions(index, from_currencies, len(amounts))]
+        target = rates[self._positions(index, to_currency, 1)][0]
+        return amounts * source / target
+
+    def rates(self, from_currencies: Sequence[str], to_currency: str) -> np.ndarray:
+        """
+        Value of one unit of each currency in to_currency, NaN for codes the
+        table does not know. Unlike convert, only to_currency must be known.
+        """
+        self.refresh()
+        index, rates = self._table
+        positions = np.array([index.get(code, -1) for code in from_currencies], dtype=np.intp)
+        source = np.where(positions >= 0, rates[positions], np.nan) if len(positions) else np.zeros(0)
+        return source / rates[self._positions(index, to_currency, 1)][0]
+
+    def round(self, amounts: np.ndarray, currency: str) -> np.ndarray:
+        """
+        Round to the currency's minor unit, e.g. paise or cents.
+        """
+        return np.round(amounts, minor_units(currency))
+
+    def total(self, amounts: np.ndarray, currency: str) -> Decimal:
+        """
+        Exact total of amounts rounded to the currency's minor unit.
+        """
+        digits = minor_units(currency)
+        units = np.rint(np.asarray(amounts, dtype=np.float64) * 10 ** digits).astype(np.int64)
+        return Decimal(int(units.sum())).scaleb(-digits)
+
+# Shared rate table
+fx_rates = FxRateTable(settings.FX_RATES_PATH, settings.FX_REFRESH_SECONDS)
@@ -0,0 +1,243 @@
+"""
+Streaming ingestion of partner catalog feeds (JSONL or CSV).
+
+Rows are read one at a time and validated in fixed-size batches, so memory
+use stays constant regardless of feed size.
+
+The command line tool does not touch a running server's catalog. It
+validates a feed and reports throughput (a dry run), and with --output it
+converts the valid rows to clean JSONL. To load data into the API, point
+CATALOG_DESTINATIONS_PATH / CATALOG_ACTIVITIES_PATH at the output, build a
+snapshot from it (app.services.snapshot), or upload the feed to
+POST /api/v1/destinations/admin/ingest (admin users, see ADMIN_EMAILS).
+
+Usage:
+    python -m app.services.ingest feed.jsonl --kind destinations          # dry run
+    python -m app.services.ingest activities.csv --format csv --kind activities
+    python -m app.services.ingest feed.csv --output catalog/destinations.jsonl
+"""
+import codecs
+import csv
+import json
+import time
+from itertools import islice
+from typing import BinaryIO, Iterator, List, Optional, TextIO, Tuple
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.models.catalog import Activity, Destination
+from app.services.catalog import CatalogStore, catalog
+from app.services.fx import fx_rates
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 50
+
+MODELS = {
+    "destinations": Destination,
+    "activities": Activity,
+}
+
+class RowError(BaseModel):
+    line: int
+    error: str
+
+class IngestReport(BaseModel):
+    kind: str
+    rows_read: int = 0
+    rows_upserted: int = 0
+    rows_rejected: int = 0
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors: List[RowError] = []
+    # Set when the feed could not be read to the end (e.g. it is not valid UTF-8)
+    feed_error: Optional[str] = None
+
+def detect_format(filename: str) -> str:
+    return "csv" if filename.lower().endswith(".csv") else "jsonl"
+
+def iter_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yield (line number, row, parse error) for every record in the stream.
+    """
+    if fmt == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Invalid JSON: {e.msg}"
+    elif fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty CSV cells mean "not provided", so the model's defaults apply
+            yield reader.line_num, {k: v for k, v in row.items() if v != ""}, None
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+def find_decode_error(raw: BinaryIO, encoding: str = "utf-8", chunk_size: int = 1 << 20) -> Optional[str]:
+    """
+    Decode a binary feed without parsing it, so a bad upload can be refused
+    before any row is upserted. Returns the first decode error, if any, and
+    rewinds the stream.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    line = 1
+    try:
+        while True:
+            chunk = raw.read(chunk_size)
+            try:
+                decoder.decode(chunk, final=not chunk)
+            except UnicodeDecodeError as e:
+                line += chunk.count(b"\n", 0, max(e.start, 0))
+                return f"Line {line} is not valid {encoding}: {e.reason}"
+            if not chunk:
+                return None
+            line += chunk.count(b"\n")
+    finally:
+        raw.seek(0)
+
+def _validate_batch(
+    adapter: TypeAdapter, model, batch: List[Tuple[int, dict]], report: IngestReport
+) -> List[Tuple[int, dict]]:
+    try:
+        items = adapter.validate_python([row for _, row in batch])
+        return [(line_number, item.model_dump()) for (line_number, _), item in zip(batch, items)]
+    except ValidationError:
+        pass
+
+    # At least one row is bad; fall back to per-row validation for this batch only
+    valid = []
+    for line_number, row in batch:
+        try:
+            valid.append((line_number, model.model_validate(row).model_dump()))
+        except ValidationError as e:
+            _reject(report, line_number, "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+    return valid
+
+def _known_currencies(rows: List[Tuple[int, dict]], report: IngestReport) -> List[Tuple[int, dict]]:
+    """
+    Reject destinations and activities priced in a currency the rate table cannot convert.
+    """
+    known = set(fx_rates.currencies)
+    valid = []
+    for line_number, record in rows:
+        if record["currency"] in known:
+            valid.append((line_number, record))
+        else:
+            _reject(report, line_number, f"currency: Unsupported currency: {record['currency']}")
+    return valid
+
+def _reject(report: IngestReport, line_number: int, error: str):
+    report.rows_rejected += 1
+    if len(report.errors) < MAX_REPORTED_ERRORS:
+        report.errors.append(RowError(line=line_number, error=error))
+
+def ingest_stream(
+    stream: TextIO,
+    fmt: str = "jsonl",
+    kind: str = "destinations",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    store: CatalogStore = catalog,
+) -> IngestReport:
+    """
+    Stream-parse a feed, validate it in batches and upsert it into the catalog.
+    """
+    if kind not in MODELS:
+        raise ValueError(f"Unsupported catalog kind: {kind}")
+    model = MODELS[kind]
+    adapter = TypeAdapter(List[model])
+    upsert = store.upsert_destinations if kind == "destinations" else store.upsert_activities
+
+    report = IngestReport(kind=kind)
+    started = time.perf_counter()
+    rows = iter_rows(stream, fmt)
+    while True:
+        try:
+            chunk = list(islice(rows, batch_size))
+        except UnicodeDecodeError as e:
+            # Batches before this one have been upserted; callers that need
+            # all-or-nothing should check the feed with find_decode_error first
+            report.feed_error = f"Feed is not valid {e.encoding} after row {report.rows_read}: {e.reason}"
+            break
+        if not chunk:
+            break
+        report.rows_read += len(chunk)
+
+        batch = []
+        for line_number, row, error in chunk:
+            if error is not None:
+                _reject(report, line_number, error)
+            else:
+                batch.append((line_number, row))
+
+        if batch:
+            valid = _validate_batch(adapter, model, batch, report)
+            valid = _known_currencies(valid, report)
+            report.rows_upserted += upsert(record for _, record in valid)
+
+    elapsed = time.perf_counter() - started
+    report.elapsed_seconds = round(elapsed, 3)
+    if elapsed > 0:
+        report.rows_per_second = round(report.rows_read / elapsed, 1)
+    return report
+
+def export_jsonl(stream: TextIO, kind: str = "destinations", store: CatalogStore = catalog) -> int:
+    """
+    Write the validated catalog back out as JSONL, one record per line.
+    """
+    records = store.iter_destinations() if kind == "destinations" else store.iter_activities()
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record) + "\n")
+        count += 1
+    return count
+
+def load_catalog_files(destinations_path: Optional[str], activities_path: Optional[str], store: CatalogStore = catalog):
+    """
+    Load catalog feeds configured in settings into the store.
+    """
+    reports = []
+    for kind, path in (("destinations", destinations_path), ("activities", activities_path)):
+        if path:
+            with open(path, newline="", encoding="utf-8") as feed:
+                report = ingest_stream(feed, fmt=detect_format(path), kind=kind, store=store)
+            if report.feed_error:
+                raise ValueError(f"{path}: {report.feed_error}")
+            reports.append(report)
+    return reports
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Validate a partner catalog feed and optionally convert it to clean JSONL. "
+                    "Without --output this is a dry run: nothing is stored."
+    )
+    parser.add_argument("path", help="Path to a JSONL or CSV feed")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Feed format (default: from file extension)")
+    parser.add_argument("--kind", choices=sorted(MODELS), default="destinations")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--output", help="Write the validated records to this JSONL file (default: dry run)")
+    args = parser.parse_args()
+
+    # Ingest into a fresh store so the output holds only what came from the feed
+    store = CatalogStore()
+    with open(args.path, newline="", encoding="utf-8") as feed:
+        result = ingest_stream(
+            feed,
+            fmt=args.format or detect_format(args.path),
+            kind=args.kind,
+            batch_size=args.batch_size,
+            store=store,
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            export_jsonl(out, kind=args.kind, store=store)
+    else:
+        print("Dry run: no --output given, nothing was stored", file=sys.stderr)
+    print(result.model_dump_json(indent=2))
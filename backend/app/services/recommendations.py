@@ -0,0 +1,300 @@
+"""
+Destination recommendations from trip preferences.
+
+Every destination is embedded as a feature vector (theme affinities, months
+worth visiting, price band, popularity). A request is embedded the same way
+and scored against the whole catalog with one matrix-vector product followed
+by a top-K selection.
+
+Snapshot destinations are scored straight from the mapped file: the
+theme/season features are precomputed in the snapshot, and cost and
+popularity are numpy views over its columns, so workers share them and
+nothing is decoded at startup. Destinations upserted on top of the snapshot
+live in a small overlay that is updated row by row as the catalog changes.
+"""
+from datetime import date, timedelta
+from threading import Lock, RLock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.trip import ActivityPreference, BudgetLevel, TripTheme
+from app.services.catalog import CatalogStore, catalog
+from app.services.features import (
+    MONTHS,
+    N_STATIC_FEATURES,
+    SEASON_OFFSET,
+    THEMES,
+    static_features,
+    theme_columns,
+)
+from app.services.fx import BASE_CURRENCY, fx_rates
+
+# Per-person daily cost bands (in BASE_CURRENCY) matching BudgetLevel
+PRICE_BANDS = [(BudgetLevel.BUDGET, 2500.0), (BudgetLevel.MID_RANGE, 7500.0), (BudgetLevel.LUXURY, float("inf"))]
+PRICE_BAND_LIMITS = np.array([upper for _, upper in PRICE_BANDS[:-1]], dtype=np.float32)
+
+THEME_WEIGHT = 1.0
+SEASON_WEIGHT = 0.5
+BUDGET_LEVEL_WEIGHT = 0.5
+POPULARITY_WEIGHT = 0.2
+OVER_BUDGET_PENALTY = 1.0
+
+N_FEATURES = N_STATIC_FEATURES + len(PRICE_BANDS) + 1
+PRICE_OFFSET = N_STATIC_FEATURES
+POPULARITY_COLUMN = N_FEATURES - 1
+
+class RecommendationIndex:
+    """
+    Destination features for one catalog: the attached snapshot plus an
+    overlay of upserted destinations, kept current through store.subscribe.
+    """
+
+    def __init__(self, store: CatalogStore):
+        self._lock = RLock()
+        self.store = store
+        self.snapshot = store.snapshot
+        self.fx_version: Optional[int] = None
+
+        # Snapshot rows, as views over the mapped columns
+        snapshot = self.snapshot
+        n = snapshot.destination_count if snapshot is not None else 0
+        if snapshot is not None:
+            static = snapshot.static_features()
+            if static is None:
+                # Written with an older keyword vocabulary; derive the features once
+                static = np.zeros((n, N_STATIC_FEATURES), dtype=np.float32)
+                for row in range(n):
+                    dest = snapshot.destination(row)
+                    static[row] = static_features(dest, [a["name"] for a in snapshot.activities_for(dest["id"])])
+            self._base_static = static
+            self._base_cost_raw = np.frombuffer(snapshot.column("dest.average_cost_per_day"), dtype=np.float64)
+            self._base_popularity = np.frombuffer(snapshot.column("dest.popularity"), dtype=np.int32)
+            self._base_currency = np.frombuffer(snapshot.column("dest.currency"), dtype=np.uint32)
+        else:
+            self._base_static = np.zeros((0, N_STATIC_FEATURES), dtype=np.float32)
+            self._base_cost_raw = np.zeros(0, dtype=np.float64)
+            self._base_popularity = np.zeros(0, dtype=np.int32)
+            self._base_currency = np.zeros(0, dtype=np.uint32)
+        # Cleared for snapshot rows shadowed by an upserted destination
+        self._base_active = np.ones(n, dtype=bool)
+        self._base_cost = np.zeros(n, dtype=np.float32)
+        self._base_band = np.zeros(n, dtype=np.intp)
+        # Includes shadowed rows; popularity only needs a common scale
+        self._base_max_popularity = int(self._base_popularity.max()) if n else 0
+        self._max_popularity = self._base_max_popularity
+
+        # Overlay rows, grown by doubling
+        self._size = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._currencies: List[str] = []
+        self._countries: Dict[str, int] = {}
+        self._static = np.zeros((0, N_STATIC_FEATURES), dtype=np.float32)
+        self._cost_raw = np.zeros(0, dtype=np.float64)
+        self._cost = np.zeros(0, dtype=np.float32)
+        self._band = np.zeros(0, dtype=np.intp)
+        self._popularity = np.zeros(0, dtype=np.int32)
+        self._country_codes = np.zeros(0, dtype=np.int32)
+
+    def _grow(self, capacity: int):
+        def resized(array: np.ndarray) -> np.ndarray:
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            return grown
+
+        self._static = resized(self._static)
+        self._cost_raw = resized(self._cost_raw)
+        self._cost = resized(self._cost)
+        self._band = resized(self._band)
+        self._popularity = resized(self._popularity)
+        self._country_codes = resized(self._country_codes)
+
+    def _add_row(self, destination_id: str) -> int:
+        row = self._size
+        if row == len(self._cost_raw):
+            self._grow(max(16, 2 * row))
+        self._size += 1
+        self._rows[destination_id] = row
+        self._ids.append(destination_id)
+        self._currencies.append(BASE_CURRENCY)
+        if self.snapshot is not None:
+            base_row = self.snapshot.find_destination_row(destination_id)
+            if base_row is not None:
+                self._base_active[base_row] = False
+        return row
+
+    def update(self, store: CatalogStore, destination_ids: Iterable[str]):
+        """
+        Re-derive the rows of the given destinations. Registered as a
+        CatalogStore listener, so it runs after every upsert.
+        """
+        with self._lock:
+            changed = []
+            for destination_id in destination_ids:
+                dest = store.get_destination(destination_id)
+                if dest is None:
+                    # Activities for a destination that has not been loaded yet
+                    continue
+                row = self._rows.get(destination_id)
+                if row is None:
+                    row = self._add_row(destination_id)
+                self._static[row] = static_features(dest, [a["name"] for a in store.get_activities(destination_id)])
+                self._cost_raw[row] = dest["average_cost_per_day"]
+                self._currencies[row] = dest.get("currency") or BASE_CURRENCY
+                self._popularity[row] = dest["popularity"]
+                self._country_codes[row] = self._countries.setdefault(dest["country"].lower(), len(self._countries))
+                changed.append(row)
+            if changed:
+                self._max_popularity = max(self._base_max_popularity, int(self._popularity[:self._size].max()))
+                if self.fx_version is not None:
+                    self._convert_overlay(np.array(changed, dtype=np.intp))
+
+    def _convert_overlay(self, rows: np.ndarray):
+        # NaN for currencies the rate table does not know; those rows are never recommended
+        rates = fx_rates.rates([self._currencies[r] for r in rows], BASE_CURRENCY)
+        self._cost[rows] = self._cost_raw[rows] * rates
+        self._band[rows] = np.searchsorted(PRICE_BAND_LIMITS, self._cost[rows], side="right")
+
+    def _refresh_costs(self):
+        """
+        Re-derive costs in BASE_CURRENCY after the exchange rates changed.
+        """
+        if self.fx_version == fx_rates.version:
+            return
+        version = fx_rates.version
+        if len(self._base_currency):
+            # One rate per distinct currency string, gathered back to the rows
+            codes, inverse = np.unique(self._base_currency, return_inverse=True)
+            currencies = [self.snapshot.string(int(code)) or BASE_CURRENCY for code in codes]
+            rates = fx_rates.rates(currencies, BASE_CURRENCY)
+            self._base_cost = (self._base_cost_raw * rates[inverse]).astype(np.float32)
+            self._base_band = np.searchsorted(PRICE_BAND_LIMITS, self._base_cost, side="right")
+        self._convert_overlay(np.arange(self._size, dtype=np.intp))
+        self.fx_version = version
+
+    def preference_vector(
+        self,
+        themes: List[TripTheme],
+        interests: List[ActivityPreference],
+        budget_level: BudgetLevel,
+        start_date: Optional[date],
+        end_date: Optional[date],
+    ) -> np.ndarray:
+        vector = np.zeros(N_FEATURES, dtype=np.float32)
+
+        weights = np.zeros(len(THEMES), dtype=np.float32)
+        for theme in themes:
+            weights[THEMES.index(theme)] = 1.0
+        for interest in interests:
+            # Interests count towards every theme whose name or keywords they mention
+            for column in theme_columns(interest.name.lower()):
+                weights[column] = max(weights[column], interest.interest_level / 5.0)
+        if weights.sum() > 0:
+            vector[:SEASON_OFFSET] = THEME_WEIGHT * weights / weights.sum()
+
+        if start_date and end_date:
+            days = (end_date - start_date).days + 1
+            months = np.zeros(len(MONTHS), dtype=np.float32)
+            for offset in range(days):
+                months[(start_date + timedelta(days=offset)).month - 1] += 1.0
+            vector[SEASON_OFFSET:PRICE_OFFSET] = SEASON_WEIGHT * months / days
+
+        level = [band for band, _ in PRICE_BANDS].index(budget_level)
+        vector[PRICE_OFFSET + level] = BUDGET_LEVEL_WEIGHT
+        vector[POPULARITY_COLUMN] = POPULARITY_WEIGHT
+        return vector
+
+    def _scores(
+        self,
+        preferences: np.ndarray,
+        static: np.ndarray,
+        bands: np.ndarray,
+        cost: np.ndarray,
+        popularity: np.ndarray,
+        daily_budget: Optional[float],
+    ) -> np.ndarray:
+        scores = static @ preferences[:N_STATIC_FEATURES]
+        # Costs in an unknown currency cannot be compared against anything
+        scores[np.isnan(cost)] = -np.inf
+        scores += preferences[PRICE_OFFSET:POPULARITY_COLUMN][bands]
+        if self._max_popularity > 0:
+            scores += preferences[POPULARITY_COLUMN] / self._max_popularity * popularity
+        if daily_budget:
+            # daily_budget is in BASE_CURRENCY. Penalise destinations costing
+            # more per day than the budget allows, up to 2x over
+            overspend = np.clip(cost / np.float32(daily_budget) - 1.0, 0.0, 1.0)
+            scores -= OVER_BUDGET_PENALTY * overspend
+        return scores
+
+    def top_k(
+        self,
+        preferences: np.ndarray,
+        limit: int,
+        daily_budget: Optional[float] = None,
+        country: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        with self._lock:
+            self._refresh_costs()
+            size = self._size
+            base = self._scores(
+                preferences, self._base_static, self._base_band, self._base_cost, self._base_popularity, daily_budget
+            )
+            overlay = self._scores(
+                preferences, self._static[:size], self._band[:size], self._cost[:size], self._popularity[:size], daily_budget
+            )
+
+            active = self._base_active
+            if country and len(base):
+                active = np.zeros(len(base), dtype=bool)
+                active[np.frombuffer(self.snapshot.country_rows(country), dtype=np.uint32)] = True
+                active &= self._base_active
+            base[~active] = -np.inf
+            if country:
+                code = self._countries.get(country.lower(), -1)
+                overlay[self._country_codes[:size] != code] = -np.inf
+
+            scores = np.concatenate([base, overlay])
+            if not len(scores):
+                return []
+            limit = min(limit, len(scores))
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            results = []
+            for row in top:
+                if not np.isfinite(scores[row]):
+                    continue
+                if row < len(base):
+                    destination_id = self.snapshot.string(self.snapshot.column("dest.id")[row])
+                else:
+                    destination_id = self._ids[row - len(base)]
+                results.append((destination_id, float(scores[row])))
+            return results
+
+_index: Optional[RecommendationIndex] = None
+_index_lock = Lock()
+
+def get_index(store: CatalogStore = catalog) -> RecommendationIndex:
+    """
+    Return the index for the catalog. It is built once per attached snapshot
+    and kept current by catalog upserts and exchange rate refreshes.
+    """
+    global _index
+    # Pick up new exchange rates; the index re-derives costs on its next query
+    fx_rates.refresh()
+    index = _index
+    if not _is_current(index, store):
+        with _index_lock:
+            if not _is_current(_index, store):
+                if _index is not None:
+                    _index.store.unsubscribe(_index.update)
+                index = RecommendationIndex(store)
+                # Replays destinations already upserted, then follows new upserts
+                store.subscribe(index.update)
+                _index = index
+            index = _index
+    return index
+
+def _is_current(index: Optional[RecommendationIndex], store: CatalogStore) -> bool:
+    return index is not None and index.store is store and index.snapshot is store.snapshot
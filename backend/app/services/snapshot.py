@@ -0,0 +1,409 @@
+"""
+Compact columnar snapshot of the destination/activity catalog.
+
+A snapshot holds one numeric column per field plus a deduplicated string
+table. It is memory-mapped read-only, so every worker reading the same file
+shares the same page-cache pages and startup needs no parsing.
+
+The theme/season features used for recommendations are computed at write
+time and stored as a float32 matrix, so workers need not derive them again.
+
+Usage:
+    python -m app.services.snapshot write catalog.snap --destinations d.jsonl --activities a.jsonl
+    python -m app.services.snapshot verify catalog.snap --destinations d.jsonl --activities a.jsonl
+"""
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.features import FEATURE_SCHEMA, N_STATIC_FEATURES, static_features
+
+MAGIC = b"TPCS"
+VERSION = 5
+NULL_STRING = 0xFFFFFFFF
+
+# magic, version, byte order (1 = little), destination count, activity count,
+# string count, string blob size, crc32 of everything after the header,
+# feature schema of dest.static_features.
+# Padded to 40 bytes so every column that follows is 8-byte aligned in the file.
+HEADER = struct.Struct("<4sHHIIIQII4x")
+
+DESTINATION_STRING_FIELDS = ("id", "name", "country", "description", "image_url", "best_time_to_visit", "currency")
+ACTIVITY_STRING_FIELDS = ("id", "destination_id", "name", "price_range", "currency")
+# Destination columns matched by text search
+SEARCH_FIELDS = ("name", "description", "country")
+
+class SnapshotError(Exception):
+    pass
+
+def _lower_bound(count: int, key_at, target) -> int:
+    """
+    First position in [0, count) whose key is not less than target.
+    """
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key_at(mid) < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def _pad(size: int) -> int:
+    return (size + 7) & ~7
+
+def _section_layout(n_destinations: int, n_activities: int, n_strings: int) -> List[Tuple[str, str, int]]:
+    """
+    Ordered (name, typecode, length) of every column in the file.
+    """
+    layout = [("string_offsets", "Q", n_strings + 1)]
+    layout.append(("dest.average_cost_per_day", "d", n_destinations))
+    layout.append(("dest.popularity", "i", n_destinations))
+    layout += [(f"dest.{field}", "I", n_destinations) for field in DESTINATION_STRING_FIELDS]
+    # Row numbers sorted by (-popularity, id), by id, and by (lower-cased country, -popularity, id)
+    layout.append(("dest.popularity_order", "I", n_destinations))
+    layout.append(("dest.id_order", "I", n_destinations))
+    layout.append(("dest.country_order", "I", n_destinations))
+    # Row-major (n_destinations, N_STATIC_FEATURES) theme/season matrix used by recommendations
+    layout.append(("dest.static_features", "f", n_destinations * N_STATIC_FEATURES))
+    # Activity rows are stored sorted by (destination_id, id)
+    layout.append(("act.duration", "i", n_activities))
+    layout += [(f"act.{field}", "I", n_activities) for field in ACTIVITY_STRING_FIELDS]
+    return layout
+
+class _StringTable:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.offsets = array("Q", [0])
+        self.blob = bytearray()
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return NULL_STRING
+        position = self.index.get(value)
+        if position is None:
+            position = len(self.index)
+            self.index[value] = position
+            self.blob += value.encode("utf-8")
+            self.offsets.append(len(self.blob))
+        return position
+
+def write_snapshot(path: str, destinations: Iterable[dict], activities: Iterable[dict]):
+    """
+    Write a snapshot atomically. Workers that already mapped the previous file
+    keep their (unlinked) copy until they re-attach.
+    """
+    destinations = list(destinations)
+    activities = sorted(activities, key=lambda a: (a["destination_id"], a["id"]))
+    strings = _StringTable()
+
+    columns = {
+        "dest.average_cost_per_day": array("d", (d["average_cost_per_day"] for d in destinations)),
+        "dest.popularity": array("i", (d["popularity"] for d in destinations)),
+        "act.duration": array("i", (a["duration"] for a in activities)),
+    }
+    for field in DESTINATION_STRING_FIELDS:
+        columns[f"dest.{field}"] = array("I", (strings.add(d.get(field)) for d in destinations))
+    for field in ACTIVITY_STRING_FIELDS:
+        columns[f"act.{field}"] = array("I", (strings.add(a.get(field)) for a in activities))
+    rows = range(len(destinations))
+    columns["dest.popularity_order"] = array("I", sorted(rows, key=lambda i: (-destinations[i]["popularity"], destinations[i]["id"])))
+    columns["dest.id_order"] = array("I", sorted(rows, key=lambda i: destinations[i]["id"]))
+    columns["dest.country_order"] = array("I", sorted(
+        rows, key=lambda i: (destinations[i]["country"].lower(), -destinations[i]["popularity"], destinations[i]["id"])
+    ))
+    columns["string_offsets"] = strings.offsets
+    activity_names: Dict[str, List[str]] = {}
+    for a in activities:
+        activity_names.setdefault(a["destination_id"], []).append(a["name"])
+    columns["dest.static_features"] = array("f")
+    for d in destinations:
+        columns["dest.static_features"].frombytes(static_features(d, activity_names.get(d["id"], ())).tobytes())
+
+    body = bytearray()
+    for name, typecode, length in _section_layout(len(destinations), len(activities), len(strings.index)):
+        data = columns[name].tobytes()
+        body += data + b"\0" * (_pad(len(data)) - len(data))
+    body += strings.blob
+
+    header = HEADER.pack(
+        MAGIC, VERSION, 1 if sys.byteorder == "little" else 0,
+        len(destinations), len(activities), len(strings.index), len(strings.blob),
+        zlib.crc32(body), FEATURE_SCHEMA,
+    )
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(header)
+        out.write(body)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_path, path)
+
+class CatalogSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file. Rows are decoded into
+    dicts on access; nothing is copied up front.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise SnapshotError("File is too small to be a catalog snapshot")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        self._columns: Dict[str, memoryview] = {}
+        self._blob: Optional[memoryview] = None
+        self._search = None
+        try:
+            self._map_columns()
+        except BaseException:
+            self.close()
+            raise
+
+    def _map_columns(self):
+        (magic, version, little_endian, self.destination_count, self.activity_count,
+         self.string_count, blob_size, self.checksum, self.feature_schema) = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise SnapshotError("Not a catalog snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version}")
+        if bool(little_endian) != (sys.byteorder == "little"):
+            raise SnapshotError("Snapshot was written on a machine with a different byte order")
+
+        layout = _section_layout(self.destination_count, self.activity_count, self.string_count)
+        sections = [(name, typecode, length * array(typecode).itemsize) for name, typecode, length in layout]
+        # Check the size implied by the header before casting anything
+        expected = HEADER.size + sum(_pad(size) for _, _, size in sections) + blob_size
+        if len(self._buffer) < expected:
+            raise SnapshotError(f"Snapshot is truncated: {len(self._buffer)} bytes, header implies {expected}")
+
+        offset = HEADER.size
+        for name, typecode, size in sections:
+            self._columns[name] = self._buffer[offset:offset + size].cast(typecode)
+            offset += _pad(size)
+        self._blob = self._buffer[offset:offset + blob_size]
+
+    def close(self):
+        self._search = None
+        for view in self._columns.values():
+            view.release()
+        self._columns = {}
+        if self._blob is not None:
+            self._blob.release()
+            self._blob = None
+        self._buffer.release()
+        self._mmap.close()
+
+    def column(self, name: str) -> memoryview:
+        """
+        Zero-copy typed view of a column, e.g. "dest.average_cost_per_day".
+        """
+        return self._columns[name]
+
+    def static_features(self) -> Optional[np.ndarray]:
+        """
+        Zero-copy (destination_count, N_STATIC_FEATURES) view of the precomputed
+        features, or None if they were written with a different vocabulary.
+        """
+        if self.feature_schema != FEATURE_SCHEMA:
+            return None
+        features = np.frombuffer(self._columns["dest.static_features"], dtype=np.float32)
+        return features.reshape(self.destination_count, N_STATIC_FEATURES)
+
+    def verify_checksum(self) -> bool:
+        return zlib.crc32(self._buffer[HEADER.size:]) == self.checksum
+
+    def string(self, position: int) -> Optional[str]:
+        if position == NULL_STRING:
+            return None
+        offsets = self._columns["string_offsets"]
+        return str(self._blob[offsets[position]:offsets[position + 1]], "utf-8")
+
+    def _field(self, name: str, row: int):
+        value = self._columns[name][row]
+        return self.string(value) if self._columns[name].format == "I" else value
+
+    def destination(self, row: int) -> dict:
+        record = {field: self._field(f"dest.{field}", row) for field in DESTINATION_STRING_FIELDS}
+        record["popularity"] = self._columns["dest.popularity"][row]
+        record["average_cost_per_day"] = self._columns["dest.average_cost_per_day"][row]
+        return record
+
+    def activity(self, row: int) -> dict:
+        record = {field: self._field(f"act.{field}", row) for field in ACTIVITY_STRING_FIELDS}
+        record["duration"] = self._columns["act.duration"][row]
+        return record
+
+    def find_destination_row(self, destination_id: str) -> Optional[int]:
+        ids = self._columns["dest.id"]
+        order = self._columns["dest.id_order"]
+        lo = _lower_bound(len(order), lambda i: self.string(ids[order[i]]), destination_id)
+        if lo < len(order) and self.string(ids[order[lo]]) == destination_id:
+            return order[lo]
+        return None
+
+    def find_destination(self, destination_id: str) -> Optional[dict]:
+        row = self.find_destination_row(destination_id)
+        return None if row is None else self.destination(row)
+
+    def activities_for(self, destination_id: str) -> List[dict]:
+        owners = self._columns["act.destination_id"]
+        lo = _lower_bound(self.activity_count, lambda i: self.string(owners[i]), destination_id)
+        results = []
+        while lo < self.activity_count and self.string(owners[lo]) == destination_id:
+            results.append(self.activity(lo))
+            lo += 1
+        return results
+
+    def iter_destinations(self) -> Iterator[dict]:
+        for row in range(self.destination_count):
+            yield self.destination(row)
+
+    def iter_activities(self) -> Iterator[dict]:
+        for row in range(self.activity_count):
+            yield self.activity(row)
+
+    def _search_index(self) -> Tuple[str, np.ndarray, np.ndarray]:
+        """
+        Every distinct string of the searchable columns, lower-cased and joined
+        with NUL separators, with each one's start offset and string position.
+        Built on first use, decoding each string once.
+        """
+        if self._search is None:
+            positions = np.unique(np.concatenate([
+                np.frombuffer(self._columns[f"dest.{field}"], dtype=np.uint32) for field in SEARCH_FIELDS
+            ]))
+            positions = positions[positions != NULL_STRING]
+            texts = [self.string(int(position)).lower() for position in positions]
+            starts = np.zeros(len(texts), dtype=np.int64)
+            if texts:
+                starts[1:] = np.cumsum([len(text) + 1 for text in texts[:-1]])
+            self._search = ("\0".join(texts), starts, positions)
+        return self._search
+
+    def search_rows(self, query: str) -> np.ndarray:
+        """
+        Rows whose name, description or country contains query
+        (case-insensitive), in row order. Only string positions are compared;
+        no row is decoded.
+        """
+        text, starts, positions = self._search_index()
+        query = query.lower()
+        hits = []
+        at = text.find(query) if "\0" not in query else -1
+        while at != -1:
+            hits.append(at)
+            # Resume at the next string; one hit per string is enough
+            end = text.find("\0", at + len(query))
+            at = text.find(query, end + 1) if end != -1 else -1
+        if not hits:
+            return np.zeros(0, dtype=np.intp)
+        matched = positions[np.searchsorted(starts, hits, side="right") - 1]
+        rows = np.zeros(self.destination_count, dtype=bool)
+        for field in SEARCH_FIELDS:
+            rows |= np.isin(np.frombuffer(self._columns[f"dest.{field}"], dtype=np.uint32), matched)
+        return np.flatnonzero(rows)
+
+    def country_rows(self, country: str) -> memoryview:
+        """
+        Rows in the given country (case-insensitive), most popular first.
+        """
+        countries = self._columns["dest.country"]
+        order = self._columns["dest.country_order"]
+        country = country.lower()
+        key_at = lambda i: self.string(countries[order[i]]).lower()
+        lo = _lower_bound(len(order), key_at, country)
+        # Upper bound: first key greater than country
+        hi = _lower_bound(len(order), lambda i: (key_at(i), 0), (country, 1))
+        return order[lo:hi]
+
+    def iter_by_popularity(self, country: Optional[str] = None) -> Iterator[Tuple[Tuple[int, str], int]]:
+        """
+        Yield ((-popularity, id), row) pairs, most popular first, optionally
+        only for one country.
+        """
+        popularity = self._columns["dest.popularity"]
+        ids = self._columns["dest.id"]
+        rows = self._columns["dest.popularity_order"] if country is None else self.country_rows(country)
+        for row in rows:
+            yield (-popularity[row], self.string(ids[row])), row
+
+def verify_snapshot(snapshot: CatalogSnapshot, destinations: Iterable[dict], activities: Iterable[dict]) -> List[str]:
+    """
+    Compare a snapshot with its source records. Returns a list of problems.
+    """
+    problems = []
+    if not snapshot.verify_checksum():
+        problems.append("Checksum mismatch")
+
+    destinations = list(destinations)
+    if len(destinations) != snapshot.destination_count:
+        problems.append(f"Destination count {snapshot.destination_count} != source {len(destinations)}")
+    for record in destinations:
+        stored = snapshot.find_destination(record["id"])
+        if stored != record:
+            problems.append(f"Destination {record['id']} differs: {stored} != {record}")
+
+    activities = sorted(activities, key=lambda a: (a["destination_id"], a["id"]))
+    if len(activities) != snapshot.activity_count:
+        problems.append(f"Activity count {snapshot.activity_count} != source {len(activities)}")
+    for row, record in enumerate(activities[:snapshot.activity_count]):
+        stored = snapshot.activity(row)
+        if stored != record:
+            problems.append(f"Activity {record['id']} differs: {stored} != {record}")
+
+    features = snapshot.static_features()
+    if features is None:
+        problems.append(f"Feature schema {snapshot.feature_schema:#x} != current {FEATURE_SCHEMA:#x}")
+    else:
+        activity_names: Dict[str, List[str]] = {}
+        for a in activities:
+            activity_names.setdefault(a["destination_id"], []).append(a["name"])
+        for record in destinations:
+            row = snapshot.find_destination_row(record["id"])
+            if row is not None and not np.array_equal(
+                features[row], static_features(record, activity_names.get(record["id"], ()))
+            ):
+                problems.append(f"Destination {record['id']} has stale features")
+    return problems
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.services.catalog import CatalogStore, catalog
+    from app.services.ingest import load_catalog_files
+
+    parser = argparse.ArgumentParser(description="Write or verify a catalog snapshot")
+    parser.add_argument("command", choices=["write", "verify"])
+    parser.add_argument("path", help="Snapshot file")
+    parser.add_argument("--destinations", help="Destinations feed (JSONL or CSV)")
+    parser.add_argument("--activities", help="Activities feed (JSONL or CSV)")
+    args = parser.parse_args()
+
+    if args.destinations or args.activities:
+        source = CatalogStore()
+        for report in load_catalog_files(args.destinations, args.activities, store=source):
+            if report.rows_rejected:
+                print(f"{report.rows_rejected} {report.kind} rows rejected; first error: {report.errors[0]}", file=sys.stderr)
+    else:
+        # Fall back to the built-in catalog
+        source = catalog
+
+    if args.command == "write":
+        write_snapshot(args.path, source.iter_destinations(), source.iter_activities())
+        print(f"Wrote {len(source)} destinations to {args.path}")
+    else:
+        snapshot = CatalogSnapshot(args.path)
+        problems = verify_snapshot(snapshot, source.iter_destinations(), source.iter_activities())
+        for problem in problems[:50]:
+            print(problem, file=sys.stderr)
+        if problems:
+            sys.exit(f"Snapshot verification failed with {len(problems)} problem(s)")
+        print(f"{args.path} matches source: {snapshot.destination_count} destinations, {snapshot.activity_count} activities")
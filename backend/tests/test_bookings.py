@@ -0,0 +1,71 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import bookings
+from app.api.v1.endpoints.auth import UserInDB, get_current_user
+
+OWNER = UserInDB(email="owner@example.com", hashed_password="x")
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(bookings, "mock_bookings", {})
+    monkeypatch.setattr(bookings, "mock_booking_counter", 1)
+    monkeypatch.setattr(bookings, "mock_refund_queue", [])
+    app = FastAPI()
+    app.include_router(bookings.router, prefix="/bookings")
+    app.dependency_overrides[get_current_user] = lambda: OWNER
+    return TestClient(app)
+
+def create_booking(client):
+    response = client.post("/bookings/", json={
+        "trip_id": "trip_1",
+        "items": [{"type": "activity", "item_id": "a1", "name": "Tour", "price": 1000, "date": "2026-11-01"}],
+        "payment_method": "upi",
+        "contact_info": {},
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+def test_atomic_batch_cancel_is_all_or_nothing(client):
+    first, second = create_booking(client), create_booking(client)
+    bookings.mock_bookings[second]["status"] = bookings.BookingStatus.COMPLETED
+
+    response = client.post("/bookings/batch/cancel", json={"booking_ids": [first, second, "missing"]})
+    assert response.status_code == 200
+    body = response.json()
+    assert [(r["booking_id"], r["status_code"]) for r in body["results"]] == [(first, 409), (second, 400), ("missing", 404)]
+    assert body["refund_batch_id"] is None
+    assert bookings.mock_bookings[first]["status"] == bookings.BookingStatus.CONFIRMED
+    assert bookings.mock_bookings[first]["payment_status"] == bookings.PaymentStatus.PAID
+    assert bookings.mock_refund_queue == []
+
+def test_non_atomic_batch_cancel_is_best_effort(client):
+    first, second = create_booking(client), create_booking(client)
+    bookings.mock_bookings[second]["status"] = bookings.BookingStatus.COMPLETED
+
+    body = client.post("/bookings/batch/cancel", json={"booking_ids": [first, second], "atomic": False}).json()
+    assert [r["status_code"] for r in body["results"]] == [200, 400]
+    assert bookings.mock_bookings[first]["status"] == bookings.BookingStatus.CANCELLED
+    assert len(bookings.mock_refund_queue) == 1
+
+def test_batch_cancel_queues_one_refund_batch(client):
+    ids = [create_booking(client) for _ in range(3)]
+
+    body = client.post("/bookings/batch/cancel", json={"booking_ids": ids + [ids[0]], "atomic": True}).json()
+    assert [r["status_code"] for r in body["results"]] == [200, 200, 200]
+    assert body["refund_batch_id"] == "refund_batch_1"
+    assert len(bookings.mock_refund_queue) == 1
+    assert [r["booking_id"] for r in bookings.mock_refund_queue[0]["refunds"]] == ids
+    for booking_id in ids:
+        assert bookings.mock_bookings[booking_id]["status"] == bookings.BookingStatus.CANCELLED
+        assert bookings.mock_bookings[booking_id]["payment_status"] == bookings.PaymentStatus.REFUND_PENDING
+
+def test_batch_get_reports_each_booking(client):
+    mine = create_booking(client)
+    theirs = create_booking(client)
+    bookings.mock_bookings[theirs]["user_id"] = "someone@example.com"
+
+    body = client.post("/bookings/batch/get", json={"booking_ids": [mine, theirs]}).json()
+    assert [(r["booking_id"], r["status_code"]) for r in body["results"]] == [(mine, 200), (theirs, 403)]
+    assert body["results"][0]["booking"]["id"] == mine
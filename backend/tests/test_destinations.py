@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import destinations
+from app.api.v1.endpoints.auth import UserInDB, get_current_user
+from app.core.config import settings
+from app.services.catalog import CatalogStore, mock_destinations
+
+ADMIN = UserInDB(email="admin@example.com", hashed_password="x")
+
+@pytest.fixture
+def store(monkeypatch):
+    store = CatalogStore()
+    store.upsert_destinations(mock_destinations + [{**mock_destinations[0], "id": "4", "country": "Nepal"}])
+    monkeypatch.setattr(destinations, "catalog", store)
+    return store
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.include_router(destinations.router, prefix="/destinations")
+    return app
+
+def upload(client, body: bytes):
+    return client.post("/destinations/admin/ingest", files={"file": ("feed.jsonl", body)})
+
+def test_popular_is_not_shadowed_by_destination_id(app, store):
+    response = TestClient(app).get("/destinations/popular", params={"country": "india", "limit": 2})
+    assert response.status_code == 200
+    assert [d["id"] for d in response.json()] == ["1", "3"]
+
+def test_ingest_requires_admin(app, store, monkeypatch):
+    client = TestClient(app)
+    feed = json.dumps({**mock_destinations[0], "name": "Overwritten"}).encode()
+    assert upload(client, feed).status_code == 401
+
+    app.dependency_overrides[get_current_user] = lambda: ADMIN
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", "someone@example.com")
+    assert upload(client, feed).status_code == 403
+    assert store.get_destination("1")["name"] == "Goa"
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", "Admin@Example.com")
+    response = upload(client, feed)
+    assert response.status_code == 200
+    assert response.json()["rows_upserted"] == 1
+    assert store.get_destination("1")["name"] == "Overwritten"
+
+def test_ingest_refuses_undecodable_feed(app, store, monkeypatch):
+    app.dependency_overrides[get_current_user] = lambda: ADMIN
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ADMIN.email)
+    feed = json.dumps({**mock_destinations[0], "name": "Overwritten"}).encode() + b"\n\xff\n"
+    response = upload(TestClient(app), feed)
+    assert response.status_code == 400
+    assert "Line 2" in response.json()["detail"]
+    # Nothing from the feed was applied
+    assert store.get_destination("1")["name"] == "Goa"
+
+def test_activity_prices_are_converted(app, store):
+    store.upsert_activities([
+        {"id": "x1", "destination_id": "1", "name": "Tour", "duration": 2, "price_range": "832-1664", "currency": "INR"},
+        {"id": "x2", "destination_id": "1", "name": "Dive", "duration": 3, "price_range": "50", "currency": "USD"},
+        {"id": "x3", "destination_id": "1", "name": "Talk", "duration": 1, "price_range": "free", "currency": "INR"},
+    ])
+    client = TestClient(app)
+    prices = {a["id"]: (a["price_range"], a["currency"]) for a in client.get("/destinations/1/activities", params={"currency": "usd"}).json()}
+    assert prices == {"x1": ("10.00-20.00", "USD"), "x2": ("50.00", "USD"), "x3": ("free", "INR")}
+
+    prices = {a["id"]: a["price_range"] for a in client.get("/destinations/1/activities", params={"currency": "JPY"}).json()}
+    assert prices["x1"] == "1486-2971"
+    assert client.get("/destinations/1/activities", params={"currency": "XYZ"}).status_code == 400
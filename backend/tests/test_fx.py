@@ -0,0 +1,65 @@
+import json
+import os
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.services.fx import FxRateTable, UnknownCurrencyError
+
+def write_rates(path, rates, base="INR", mtime=None):
+    path.write_text(json.dumps({"base": base, "rates": rates}))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+def test_convert_per_amount_currencies():
+    table = FxRateTable()
+    converted = table.convert([83.2, 90.5, 100.0], ["USD", "EUR", "INR"], "INR")
+    assert np.allclose(converted, [83.2 * 83.2, 90.5 * 90.5, 100.0])
+    assert np.allclose(table.convert([1000.0], "INR", "USD"), [1000.0 / 83.2])
+
+def test_total_uses_minor_units():
+    table = FxRateTable()
+    # JPY has no minor unit: amounts round to whole yen before summing
+    yen = table.round(table.convert([100.0, 100.0, 100.0], "INR", "JPY"), "JPY")
+    assert np.array_equal(yen, [179.0, 179.0, 179.0])
+    assert table.total(yen, "JPY") == Decimal(537)
+    assert table.total([0.1, 0.2], "USD") == Decimal("0.30")
+
+def test_unknown_currency():
+    table = FxRateTable()
+    with pytest.raises(UnknownCurrencyError):
+        table.convert([1.0, 2.0], ["USD", "XYZ"], "INR")
+    with pytest.raises(UnknownCurrencyError):
+        table.convert([1.0], "INR", "XYZ")
+    rates = table.rates(["USD", "XYZ"], "INR")
+    assert rates[0] == pytest.approx(83.2) and np.isnan(rates[1])
+
+def test_reload_when_file_changes(tmp_path):
+    path = tmp_path / "rates.json"
+    write_rates(path, {"USD": 1.0, "INR": 0.012}, base="USD", mtime=1000)
+    table = FxRateTable(str(path), refresh_seconds=0)
+    assert table.convert([1.0], "USD", "INR")[0] == pytest.approx(1 / 0.012)
+    version = table.version
+
+    write_rates(path, {"INR": 1.0, "USD": 80.0}, mtime=2000)
+    assert table.convert([1.0], "USD", "INR")[0] == pytest.approx(80.0)
+    assert table.version > version
+
+@pytest.mark.parametrize("bad_rates", [
+    {"INR": 1.0, "USD": 0},
+    {"INR": 1.0, "USD": -5.0},
+    {"INR": 1.0, "USD": float("nan")},
+    {"USD": 1.0, "INR": 0.0},
+])
+def test_bad_rates_keep_last_good_table(tmp_path, bad_rates):
+    path = tmp_path / "rates.json"
+    write_rates(path, {"INR": 1.0, "USD": 80.0}, mtime=1000)
+    table = FxRateTable(str(path), refresh_seconds=0)
+    version = table.version
+
+    write_rates(path, bad_rates, base="USD" if bad_rates["USD"] == 1.0 else "INR", mtime=2000)
+    assert table.convert([1.0], "USD", "INR")[0] == pytest.approx(80.0)
+    assert table.version == version
+    with pytest.raises(ValueError):
+        table.refresh(force=True)
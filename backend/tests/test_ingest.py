@@ -0,0 +1,91 @@
+import io
+import json
+
+from app.services.catalog import CatalogStore, mock_activities, mock_destinations
+from app.services.ingest import find_decode_error, ingest_stream
+
+def jsonl(rows):
+    return io.StringIO("".join(json.dumps(row) + "\n" for row in rows))
+
+def test_rows_in_unknown_currencies_are_rejected():
+    rows = [
+        mock_destinations[0],
+        {**mock_destinations[1], "currency": "XYZ"},
+        {**mock_destinations[2], "currency": "usd"},
+    ]
+    store = CatalogStore()
+    report = ingest_stream(jsonl(rows), store=store)
+
+    assert (report.rows_read, report.rows_upserted, report.rows_rejected) == (3, 2, 1)
+    assert report.errors[0].line == 2
+    assert "XYZ" in report.errors[0].error
+    assert store.get_destination("2") is None
+    assert store.get_destination("3")["currency"] == "USD"
+
+def test_csv_empty_cells_use_defaults():
+    feed = io.StringIO(
+        "id,name,country,description,image_url,popularity,best_time_to_visit,average_cost_per_day,currency\n"
+        "c1,Hampi,India,Ruins,,70,October to February,2000,\n"
+        "c2,Bad,India,Missing popularity,,,All year,100,INR\n"
+    )
+    store = CatalogStore()
+    report = ingest_stream(feed, fmt="csv", store=store)
+
+    assert (report.rows_upserted, report.rows_rejected) == (1, 1)
+    assert report.errors[0].line == 3 and "popularity" in report.errors[0].error
+    record = store.get_destination("c1")
+    assert record["image_url"] is None
+    assert record["currency"] == "INR"
+    assert record["popularity"] == 70
+
+def test_batch_fallback_reports_line_numbers():
+    lines = [json.dumps(mock_destinations[0]), "", "{not json", json.dumps({**mock_destinations[1], "popularity": "high"}),
+             json.dumps(mock_destinations[2])]
+    report = ingest_stream(io.StringIO("\n".join(lines) + "\n"), batch_size=2, store=CatalogStore())
+
+    assert (report.rows_read, report.rows_upserted, report.rows_rejected) == (4, 2, 2)
+    assert [e.line for e in report.errors] == [3, 4]
+    assert report.errors[0].error.startswith("Invalid JSON")
+
+def test_reupsert_moves_indexes():
+    store = CatalogStore()
+    store.upsert_destinations(mock_destinations)
+    store.upsert_destinations([{**mock_destinations[0], "country": "Portugal", "popularity": 10}])
+
+    assert [d["id"] for d in store.popular(10, "india")] == ["3", "2"]
+    assert [d["id"] for d in store.popular(10, "portugal")] == ["1"]
+    assert [d["id"] for d in store.popular(10)] == ["3", "2", "1"]
+    assert len(store._popularity) == 3
+
+def test_activity_moves_to_another_destination():
+    store = CatalogStore()
+    store.upsert_destinations(mock_destinations)
+    store.upsert_activities(mock_activities)
+    store.upsert_activities([{**mock_activities[0], "destination_id": "2"}])
+
+    assert "a1" not in {a["id"] for a in store.get_activities("1")}
+    assert "a1" in {a["id"] for a in store.get_activities("2")}
+    assert sum(1 for a in store.iter_activities() if a["id"] == "a1") == 1
+
+def test_undecodable_feed_is_reported():
+    raw = json.dumps(mock_destinations[0]).encode() + b"\n" + b'{"id": "\xff"}\n'
+    assert find_decode_error(io.BytesIO(raw)) == "Line 2 is not valid utf-8: invalid start byte"
+    assert find_decode_error(io.BytesIO(raw[:-14])) is None
+
+    report = ingest_stream(io.TextIOWrapper(io.BytesIO(raw), encoding="utf-8"), store=CatalogStore())
+    assert report.feed_error is not None
+
+def test_out_of_range_popularity_is_rejected_per_row():
+    rows = [mock_destinations[0], {**mock_destinations[1], "popularity": 3_000_000_000}, {**mock_destinations[2], "popularity": -1}]
+    store = CatalogStore()
+    report = ingest_stream(jsonl(rows), store=store)
+
+    assert (report.rows_upserted, report.rows_rejected) == (1, 2)
+    assert [e.line for e in report.errors] == [2, 3]
+    assert all(e.error.startswith("popularity") for e in report.errors)
+
+def test_activity_rows_in_unknown_currencies_are_rejected():
+    rows = [mock_activities[0], {**mock_activities[1], "currency": "XYZ"}]
+    report = ingest_stream(jsonl(rows), kind="activities", store=CatalogStore())
+    assert (report.rows_upserted, report.rows_rejected) == (1, 1)
+    assert report.errors[0].line == 2
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import destinations
+from app.models.trip import BudgetLevel, TripTheme
+from app.services.catalog import CatalogStore, mock_activities, mock_destinations
+from app.services.features import MONTHS, THEMES, season_vector, theme_columns
+from app.services.recommendations import RecommendationIndex
+from app.services.snapshot import CatalogSnapshot, write_snapshot
+
+def themes_in(text):
+    return {THEMES[column] for column in theme_columns(text)}
+
+def months_in(text):
+    return [MONTHS[m] for m in np.flatnonzero(season_vector(text) == 1.0)]
+
+def recommend(index, *themes, **kwargs):
+    preferences = index.preference_vector(list(themes), [], BudgetLevel.MID_RANGE, None, None)
+    return [destination_id for destination_id, _ in index.top_k(preferences, 10, **kwargs)]
+
+def test_keywords_match_whole_words():
+    assert themes_in("barcelona spain, a fortune of comfort") == set()
+    assert themes_in("forts and beaches") >= {TripTheme.CULTURAL, TripTheme.BEACH}
+    assert TripTheme.WELLNESS in themes_in("ayurvedic massage")
+
+def test_season_covers_every_range_and_month():
+    assert months_in("Maybe marine jungle") == []
+    assert months_in("March to May and September to November") == ["mar", "apr", "may", "sep", "oct", "nov"]
+    assert months_in("Nov-Feb, also July") == ["jan", "feb", "jul", "nov", "dec"]
+    assert months_in("Year round") == MONTHS
+
+def test_upserts_update_rows_in_place():
+    store = CatalogStore()
+    store.upsert_destinations(mock_destinations)
+    store.upsert_activities(mock_activities)
+    index = RecommendationIndex(store)
+    store.subscribe(index.update)
+    assert recommend(index, TripTheme.WILDLIFE)[0] == "2"  # elephant ride
+
+    store.upsert_destinations([{**mock_destinations[0], "id": "9", "name": "Tiger Safari Camp", "popularity": 99}])
+    assert recommend(index, TripTheme.WILDLIFE)[0] == "9"
+    store.upsert_activities([{"id": "a99", "destination_id": "3", "name": "Bird Sanctuary", "duration": 2, "price_range": "100-200"}])
+    assert set(recommend(index, TripTheme.WILDLIFE)[:3]) == {"2", "3", "9"}
+    assert recommend(index, country="nowhere") == []
+
+def test_snapshot_rows_are_shadowed_by_upserts(tmp_path):
+    path = tmp_path / "catalog.snap"
+    write_snapshot(str(path), mock_destinations, mock_activities)
+    snapshot = CatalogSnapshot(str(path))
+    store = CatalogStore()
+    store.attach_snapshot(snapshot)
+    index = RecommendationIndex(store)
+    store.subscribe(index.update)
+    assert recommend(index, TripTheme.HONEYMOON)[0] == "3"  # backwaters
+
+    store.upsert_destinations([{**mock_destinations[2], "country": "Sri Lanka"}])
+    assert recommend(index, TripTheme.HONEYMOON, country="india")[:1] != ["3"]
+    assert recommend(index, TripTheme.HONEYMOON, country="sri lanka") == ["3"]
+    assert recommend(index).count("3") == 1
+    # The index holds views into the mapping; drop them before unmapping
+    store.unsubscribe(index.update)
+    del index
+    snapshot.close()
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(destinations.router, prefix="/destinations")
+    return TestClient(app)
+
+def test_budget_without_dates_is_rejected(client):
+    response = client.post("/destinations/recommendations", json={"budget": 50000})
+    assert response.status_code == 400
+    response = client.post("/destinations/recommendations", json={
+        "budget": 50000, "start_date": "2026-12-01", "end_date": "2026-12-05", "themes": ["beach"],
+    })
+    assert response.status_code == 200
+    assert response.json()[0]["id"] == "1"
+
+def test_unknown_catalog_currency_is_skipped_not_fatal(client, monkeypatch):
+    # Bad data that bypassed ingest validation must not fail callers' requests
+    store = CatalogStore()
+    store.upsert_destinations(mock_destinations[:2] + [{**mock_destinations[2], "currency": "XYZ"}])
+    index = RecommendationIndex(store)
+    store.subscribe(index.update)
+    assert "3" not in recommend(index)
+    assert "3" not in recommend(index, daily_budget=5000.0)
+
+    monkeypatch.setattr(destinations, "catalog", store)
+    response = client.post("/destinations/search", json={"query": "india", "currency": "usd"})
+    assert response.status_code == 200
+    assert [d["currency"] for d in response.json()] == ["USD", "USD", "XYZ"]
+    response = client.post("/destinations/search", json={"query": "india", "currency": "XYZ"})
+    assert response.status_code == 400
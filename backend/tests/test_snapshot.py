@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from app.services.catalog import CatalogStore, mock_activities, mock_destinations
+from app.services.snapshot import HEADER, CatalogSnapshot, SnapshotError, verify_snapshot, write_snapshot
+
+def make_destination(i, country="India", **overrides):
+    record = {
+        "id": f"d{i}",
+        "name": f"Place {i}",
+        "country": country,
+        "description": "Sunny beaches",
+        "image_url": None,
+        "popularity": i % 100,
+        "best_time_to_visit": "November to February",
+        "average_cost_per_day": 1000.5 + i,
+        "currency": "INR",
+    }
+    record.update(overrides)
+    return record
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "catalog.snap"
+    write_snapshot(str(path), mock_destinations, mock_activities)
+    snap = CatalogSnapshot(str(path))
+    yield snap
+    snap.close()
+
+def test_round_trip(snapshot):
+    assert snapshot.destination_count == len(mock_destinations)
+    assert snapshot.activity_count == len(mock_activities)
+    for record in mock_destinations:
+        assert snapshot.find_destination(record["id"]) == record
+    assert snapshot.find_destination("missing") is None
+    assert sorted(a["id"] for a in snapshot.activities_for("1")) == ["a1", "a2", "a3"]
+    assert snapshot.activities_for("missing") == []
+
+def test_verify_matches_source(snapshot):
+    assert verify_snapshot(snapshot, mock_destinations, mock_activities) == []
+
+def test_verify_reports_differences(snapshot):
+    changed = [dict(mock_destinations[0], popularity=1)] + mock_destinations[1:]
+    problems = verify_snapshot(snapshot, changed, mock_activities[1:])
+    assert any("Destination 1 differs" in p for p in problems)
+    assert any("Activity count" in p for p in problems)
+
+def test_unicode_and_null_strings(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    records = [make_destination(1, name="Zürich ☃", image_url=None), make_destination(2, image_url="https://x/2.jpg")]
+    write_snapshot(path, records, [])
+    snap = CatalogSnapshot(path)
+    assert [snap.find_destination(r["id"]) for r in records] == records
+    snap.close()
+
+def test_columns_are_aligned(snapshot):
+    assert HEADER.size % 8 == 0
+    # The mapping is page-aligned, so column addresses show file alignment
+    for name in ("string_offsets", "dest.average_cost_per_day", "dest.popularity", "dest.country_order"):
+        assert np.frombuffer(snapshot.column(name), dtype=np.uint8).ctypes.data % 8 == 0
+
+def test_country_order(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    records = [make_destination(i, country=["India", "Nepal", "bhutan"][i % 3]) for i in range(30)]
+    write_snapshot(path, records, [])
+    snap = CatalogSnapshot(path)
+    nepal = [snap.destination(row) for row in snap.country_rows("NEPAL")]
+    assert {d["country"] for d in nepal} == {"Nepal"}
+    assert len(nepal) == 10
+    assert [d["popularity"] for d in nepal] == sorted((d["popularity"] for d in nepal), reverse=True)
+    assert len(snap.country_rows("Bhutan")) == 10
+    assert len(snap.country_rows("Atlantis")) == 0
+    snap.close()
+
+def test_store_popular_with_snapshot(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(path, [make_destination(i, country="Nepal" if i % 2 else "India") for i in range(20)], [])
+    store = CatalogStore()
+    store.attach_snapshot(CatalogSnapshot(path))
+    store.upsert_destinations([make_destination(100, country="Nepal", popularity=500)])
+    # Moving a snapshot row to another country must hide it from its old country
+    store.upsert_destinations([make_destination(19, country="India")])
+
+    nepal = store.popular(3, "nepal")
+    assert [d["id"] for d in nepal] == ["d100", "d17", "d15"]
+    assert "d19" in [d["id"] for d in store.popular(20, "India")]
+    assert store.popular(5, "Atlantis") == []
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-snapshot"
+    path.write_bytes(b"x" * 100)
+    with pytest.raises(SnapshotError):
+        CatalogSnapshot(str(path))
+    path.write_bytes(b"x")
+    with pytest.raises(SnapshotError):
+        CatalogSnapshot(str(path))
+    path.write_bytes(b"")
+    with pytest.raises(SnapshotError):
+        CatalogSnapshot(str(path))
+
+def test_rejects_truncated_files(tmp_path):
+    path = tmp_path / "catalog.snap"
+    write_snapshot(str(path), mock_destinations, mock_activities)
+    data = path.read_bytes()
+    for size in (HEADER.size, HEADER.size + 3, len(data) - 1):
+        path.write_bytes(data[:size])
+        with pytest.raises(SnapshotError, match="truncated"):
+            CatalogSnapshot(str(path))
+
+def test_store_search_with_snapshot(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    records = [make_destination(i, name=f"Place {i}", country=["India", "Nepal"][i % 2]) for i in range(10)]
+    records[3]["description"] = "Himalayan TREKS"
+    write_snapshot(path, records, [])
+    store = CatalogStore()
+    store.attach_snapshot(CatalogSnapshot(path))
+    store.upsert_destinations([make_destination(5, name="Renamed", description="Treks and lakes")])
+
+    assert [d["id"] for d in store.search("treks", 10)] == ["d5", "d3"]
+    assert [d["id"] for d in store.search("nepal", 3)] == ["d1", "d3", "d7"]
+    assert [d["id"] for d in store.search("india", 2)] == ["d5", "d0"]
+    assert [d["id"] for d in store.search("place 7", 10)] == ["d7"]
+    assert store.search("atlantis", 10) == []